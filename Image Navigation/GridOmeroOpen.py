@@ -1,436 +1,828 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk, ImageDraw
-import tifffile
-
-# Try to import OpenSlide for whole slide imaging
-try:
-    import openslide
-    OPENSLIDE_AVAILABLE = True
-except ImportError:
-    OPENSLIDE_AVAILABLE = False
-    print("OpenSlide not available. Install with: pip install openslide-python")
-
-class WholeSlideImageViewer:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Whole Slide Image Viewer with Grid")
-        
-        # Image variables
-        self.slide = None  # OpenSlide object
-        self.image = None  # PIL Image (for small images)
-        self.use_openslide = False
-        self.slide_dimensions = (0, 0)
-        self.level_count = 0
-        self.level_dimensions = []
-        self.level_downsamples = []
-        
-        # View variables
-        self.zoom = 1.0
-        self.offset_x = 0
-        self.offset_y = 0
-        self.photo = None
-        self.show_grid = True
-        self.grid_size = 5000  # Larger default for WSI
-        self.max_cols = 0
-        self.max_rows = 0
-        
-        self.setup_ui()
-        
-    def setup_ui(self):
-        # Top controls
-        top = tk.Frame(self.root)
-        top.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
-        
-        tk.Button(top, text="Load Image", command=self.load_image, 
-                 width=12, bg='lightblue').pack(side=tk.LEFT, padx=2)
-        tk.Button(top, text="Grid ON/OFF", command=self.toggle_grid, width=10).pack(side=tk.LEFT, padx=2)
-        
-        tk.Label(top, text="Grid Size:").pack(side=tk.LEFT, padx=5)
-        for size in [1000, 2000, 5000, 10000]:
-            tk.Button(top, text=str(size), command=lambda s=size: self.set_grid_size(s), 
-                     width=6).pack(side=tk.LEFT, padx=1)
-        
-        tk.Label(top, text="Zoom:").pack(side=tk.LEFT, padx=5)
-        tk.Button(top, text="-", command=self.zoom_out, width=3).pack(side=tk.LEFT)
-        self.lbl_zoom = tk.Label(top, text="100%", width=8, relief=tk.SUNKEN)
-        self.lbl_zoom.pack(side=tk.LEFT)
-        tk.Button(top, text="+", command=self.zoom_in, width=3).pack(side=tk.LEFT)
-        
-        tk.Button(top, text="Reset", command=self.reset, width=6).pack(side=tk.LEFT, padx=10)
-        
-        self.lbl_sector = tk.Label(top, text="Sector: -", fg='blue', font=('Arial', 9, 'bold'))
-        self.lbl_sector.pack(side=tk.RIGHT, padx=10)
-        
-        # Main area
-        main = tk.Frame(self.root)
-        main.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Canvas
-        self.canvas = tk.Canvas(main, bg='gray')
-        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Side panel
-        side = tk.Frame(main, width=260, relief=tk.RAISED, bd=2)
-        side.pack(side=tk.RIGHT, fill=tk.Y, padx=(5,0))
-        side.pack_propagate(False)
-        
-        tk.Label(side, text="Sector Navigator", font=('Arial', 12, 'bold')).pack(pady=15)
-        
-        # Sector selector
-        selector_frame = tk.LabelFrame(side, text="Go to Sector", font=('Arial', 10, 'bold'))
-        selector_frame.pack(padx=10, pady=10, fill=tk.X)
-        
-        col_frame = tk.Frame(selector_frame)
-        col_frame.pack(pady=8, padx=10, fill=tk.X)
-        tk.Label(col_frame, text="Column:", font=('Arial', 9, 'bold'), width=8, anchor='w').pack(side=tk.LEFT)
-        self.spin_col = tk.Spinbox(col_frame, from_=0, to=0, width=8, font=('Arial', 10))
-        self.spin_col.pack(side=tk.LEFT, padx=5)
-        
-        row_frame = tk.Frame(selector_frame)
-        row_frame.pack(pady=8, padx=10, fill=tk.X)
-        tk.Label(row_frame, text="Row:", font=('Arial', 9, 'bold'), width=8, anchor='w').pack(side=tk.LEFT)
-        self.spin_row = tk.Spinbox(row_frame, from_=0, to=0, width=8, font=('Arial', 10))
-        self.spin_row.pack(side=tk.LEFT, padx=5)
-        
-        tk.Button(selector_frame, text="GO TO SECTOR", command=self.goto_sector, 
-                 bg='lightgreen', width=18, font=('Arial', 10, 'bold'), height=2).pack(pady=15)
-        
-        tk.Label(side, text="─" * 38).pack(pady=10)
-        
-        # Image info
-        info_frame = tk.LabelFrame(side, text="Image Information", font=('Arial', 10, 'bold'))
-        info_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
-        
-        self.lbl_info = tk.Label(info_frame, text="No image loaded", fg='gray', 
-                                 wraplength=230, justify=tk.LEFT, font=('Arial', 8))
-        self.lbl_info.pack(pady=10, padx=10, anchor='w')
-        
-        # Status
-        self.lbl_status = tk.Label(side, text="", fg='green', font=('Arial', 8, 'italic'))
-        self.lbl_status.pack(pady=5)
-        
-        # Navigation help
-        tk.Label(side, text="Navigation:", font=('Arial', 9, 'bold')).pack(pady=(10,5))
-        tk.Label(side, text="• Drag to pan", font=('Arial', 8)).pack(anchor='w', padx=20)
-        tk.Label(side, text="• Mouse wheel to zoom", font=('Arial', 8)).pack(anchor='w', padx=20)
-        tk.Label(side, text="• Pyramid levels auto-selected", font=('Arial', 8)).pack(anchor='w', padx=20)
-        
-        # Bindings
-        self.canvas.bind("<ButtonPress-1>", lambda e: setattr(self, 'pan_start', (e.x, e.y)))
-        self.canvas.bind("<B1-Motion>", self.pan)
-        self.canvas.bind("<MouseWheel>", lambda e: self.zoom_in() if e.delta > 0 else self.zoom_out())
-        self.canvas.bind("<Button-4>", lambda e: self.zoom_in())
-        self.canvas.bind("<Button-5>", lambda e: self.zoom_out())
-        
-    def load_image(self):
-        path = filedialog.askopenfilename(
-            filetypes=[
-                ("Whole Slide", "*.ndpi *.svs *.tif *.tiff *.vms *.vmu *.scn *.mrxs *.bif"),
-                ("All Images", "*.png *.jpg *.jpeg *.bmp"),
-                ("All", "*.*")
-            ])
-        if not path:
-            return
-        
-        try:
-            # Close previous slide/image
-            if self.slide:
-                self.slide.close()
-            self.slide = None
-            self.image = None
-            self.use_openslide = False
-            
-            # Try OpenSlide first for WSI formats
-            if OPENSLIDE_AVAILABLE and path.lower().endswith(('.ndpi', '.svs', '.vms', '.vmu', '.scn', '.mrxs', '.tif', '.tiff', '.bif')):
-                try:
-                    self.slide = openslide.OpenSlide(path)
-                    self.use_openslide = True
-                    self.slide_dimensions = self.slide.dimensions
-                    self.level_count = self.slide.level_count
-                    self.level_dimensions = self.slide.level_dimensions
-                    self.level_downsamples = self.slide.level_downsamples
-                    
-                    self.lbl_status.config(text=f"✓ Using OpenSlide ({self.level_count} pyramid levels)", fg='green')
-                    
-                except openslide.OpenSlideError:
-                    # If OpenSlide fails, try regular image loading
-                    self.use_openslide = False
-            
-            # Fallback to PIL/tifffile for regular images
-            if not self.use_openslide:
-                if path.endswith(('.tif', '.tiff')):
-                    self.image = Image.fromarray(tifffile.imread(path))
-                else:
-                    self.image = Image.open(path)
-                self.slide_dimensions = (self.image.width, self.image.height)
-                self.lbl_status.config(text="✓ Using PIL/tifffile (standard loading)", fg='orange')
-            
-            self.update_info()
-            self.reset()
-            messagebox.showinfo("Success", 
-                f"Image loaded successfully\n"
-                f"Size: {self.slide_dimensions[0]} x {self.slide_dimensions[1]} px\n"
-                f"Method: {'OpenSlide' if self.use_openslide else 'Standard'}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load image:\n{str(e)}")
-            self.lbl_status.config(text="✗ Error loading image", fg='red')
-    
-    def update_info(self):
-        if not self.slide_dimensions[0]:
-            return
-        
-        w, h = self.slide_dimensions
-        self.max_cols = (w + self.grid_size - 1) // self.grid_size
-        self.max_rows = (h + self.grid_size - 1) // self.grid_size
-        
-        self.spin_col.config(from_=0, to=max(0, self.max_cols-1))
-        self.spin_row.config(from_=0, to=max(0, self.max_rows-1))
-        
-        info_text = f"Dimensions:\n  {w:,} x {h:,} px\n\n"
-        info_text += f"File size: {w * h / 1e6:.1f} megapixels\n\n"
-        info_text += f"Grid Cell: {self.grid_size:,} px\n\n"
-        info_text += f"Grid Layout:\n  {self.max_cols} cols x {self.max_rows} rows\n\n"
-        info_text += f"Total Sectors: {self.max_cols * self.max_rows}\n\n"
-        
-        if self.use_openslide:
-            info_text += f"Pyramid Levels: {self.level_count}\n"
-            info_text += f"Magnification: {self.slide.properties.get(openslide.PROPERTY_NAME_OBJECTIVE_POWER, 'N/A')}\n"
-        
-        self.lbl_info.config(text=info_text)
-    
-    def get_best_level(self, zoom):
-        """Select best pyramid level based on zoom"""
-        if not self.use_openslide:
-            return 0
-        
-        # Find level with downsample closest to 1/zoom
-        target_downsample = 1.0 / zoom
-        best_level = 0
-        min_diff = abs(self.level_downsamples[0] - target_downsample)
-        
-        for level, downsample in enumerate(self.level_downsamples):
-            diff = abs(downsample - target_downsample)
-            if diff < min_diff:
-                min_diff = diff
-                best_level = level
-        
-        return best_level
-    
-    def read_region(self, x, y, width, height, zoom):
-        """Read a region from the image at given zoom"""
-        if self.use_openslide:
-            level = self.get_best_level(zoom)
-            downsample = self.level_downsamples[level]
-            
-            # Calculate size at selected level
-            level_width = int(width / downsample)
-            level_height = int(height / downsample)
-            
-            # Read region from slide
-            region = self.slide.read_region((int(x), int(y)), level, (level_width, level_height))
-            region = region.convert('RGB')
-            
-            # Scale to desired size
-            target_width = int(width * zoom)
-            target_height = int(height * zoom)
-            region = region.resize((target_width, target_height), Image.Resampling.LANCZOS)
-            
-            return region
-        else:
-            # Standard PIL crop and resize
-            x2 = min(x + width, self.image.width)
-            y2 = min(y + height, self.image.height)
-            region = self.image.crop((int(x), int(y), int(x2), int(y2)))
-            target_w = int((x2 - x) * zoom)
-            target_h = int((y2 - y) * zoom)
-            return region.resize((target_w, target_h), Image.Resampling.LANCZOS)
-    
-    def draw_grid(self, img):
-        if not self.show_grid:
-            return img
-        
-        img = img.convert('RGBA')
-        draw = ImageDraw.Draw(img, 'RGBA')
-        
-        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
-        cell = self.grid_size * self.zoom
-        ox = (self.offset_x % self.grid_size) * self.zoom
-        oy = (self.offset_y % self.grid_size) * self.zoom
-        
-        first_col = int(self.offset_x // self.grid_size)
-        first_row = int(self.offset_y // self.grid_size)
-        
-        # Vertical lines
-        x, col = -ox, first_col
-        while x < w:
-            if 0 <= x <= img.width:
-                draw.line([(x, 0), (x, img.height)], fill=(255,255,0,220), width=3)
-                if x > 30:
-                    t = f"Col {col}"
-                    bbox = draw.textbbox((0,0), t)
-                    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-                    draw.rectangle([x-tw//2-5, 5, x+tw//2+5, 5+th+10], fill=(0,0,0,220))
-                    draw.text((x-tw//2, 8), t, fill=(255,255,0,255))
-            x += cell
-            col += 1
-        
-        # Horizontal lines
-        y, row = -oy, first_row
-        while y < h:
-            if 0 <= y <= img.height:
-                draw.line([(0, y), (img.width, y)], fill=(255,255,0,220), width=3)
-                if y > 30:
-                    t = f"Row {row}"
-                    bbox = draw.textbbox((0,0), t)
-                    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-                    draw.rectangle([5, y-th//2-5, 5+tw+10, y+th//2+5], fill=(0,0,0,220))
-                    draw.text((8, y-th//2), t, fill=(255,255,0,255))
-            y += cell
-            row += 1
-        
-        # Sector labels (only if zoom is reasonable)
-        if self.zoom >= 0.3:
-            x_start, col = -ox + cell/2, first_col
-            while x_start < w + cell:
-                y_start, row = -oy + cell/2, first_row
-                while y_start < h + cell:
-                    if 0 < x_start < img.width and 0 < y_start < img.height:
-                        if col < self.max_cols and row < self.max_rows:
-                            sector_text = f"Sector\n({col},{row})"
-                            lines = sector_text.split('\n')
-                            max_width = 0
-                            total_height = 0
-                            for line in lines:
-                                bbox = draw.textbbox((0,0), line)
-                                line_width = bbox[2] - bbox[0]
-                                line_height = bbox[3] - bbox[1]
-                                max_width = max(max_width, line_width)
-                                total_height += line_height + 2
-                            
-                            padding = 8
-                            draw.rectangle([
-                                x_start - max_width//2 - padding,
-                                y_start - total_height//2 - padding,
-                                x_start + max_width//2 + padding,
-                                y_start + total_height//2 + padding
-                            ], fill=(50, 50, 50, 180))
-                            
-                            current_y = y_start - total_height//2
-                            for line in lines:
-                                bbox = draw.textbbox((0,0), line)
-                                line_width = bbox[2] - bbox[0]
-                                line_height = bbox[3] - bbox[1]
-                                draw.text((x_start - line_width//2, current_y), line, 
-                                        fill=(255,255,255,255))
-                                current_y += line_height + 2
-                    
-                    y_start += cell
-                    row += 1
-                x_start += cell
-                col += 1
-        
-        return img
-    
-    def update_view(self):
-        if not self.slide_dimensions[0]:
-            return
-        
-        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
-        view_w = int(w / self.zoom)
-        view_h = int(h / self.zoom)
-        
-        max_w, max_h = self.slide_dimensions
-        view_w = min(view_w, max_w)
-        view_h = min(view_h, max_h)
-        
-        self.offset_x = max(0, min(self.offset_x, max_w - view_w))
-        self.offset_y = max(0, min(self.offset_y, max_h - view_h))
-        
-        # Read region on demand
-        region = self.read_region(self.offset_x, self.offset_y, view_w, view_h, self.zoom)
-        region = self.draw_grid(region)
-        
-        self.photo = ImageTk.PhotoImage(region)
-        self.canvas.delete("all")
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
-        
-        # Update sector
-        cx = self.offset_x + (view_w / 2)
-        cy = self.offset_y + (view_h / 2)
-        col = int(cx // self.grid_size)
-        row = int(cy // self.grid_size)
-        self.lbl_sector.config(text=f"Sector: (Col {col}, Row {row})")
-    
-    def toggle_grid(self):
-        self.show_grid = not self.show_grid
-        self.update_view()
-    
-    def set_grid_size(self, size):
-        self.grid_size = size
-        self.update_info()
-        self.update_view()
-    
-    def goto_sector(self):
-        if not self.slide_dimensions[0]:
-            messagebox.showwarning("Warning", "Load an image first")
-            return
-        try:
-            col = int(self.spin_col.get())
-            row = int(self.spin_row.get())
-            
-            if col < 0 or col >= self.max_cols or row < 0 or row >= self.max_rows:
-                messagebox.showerror("Error", 
-                    f"Out of bounds! Valid: Col 0-{self.max_cols-1}, Row 0-{self.max_rows-1}")
-                return
-            
-            cx = (col * self.grid_size) + (self.grid_size / 2)
-            cy = (row * self.grid_size) + (self.grid_size / 2)
-            
-            w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
-            self.offset_x = cx - (w/self.zoom/2)
-            self.offset_y = cy - (h/self.zoom/2)
-            self.update_view()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid values")
-    
-    def zoom_in(self):
-        if self.slide_dimensions[0]:
-            self.zoom = min(self.zoom * 1.5, 10.0)
-            self.lbl_zoom.config(text=f"{int(self.zoom*100)}%")
-            if self.use_openslide:
-                level = self.get_best_level(self.zoom)
-                self.lbl_zoom.config(text=f"{int(self.zoom*100)}% (L{level})")
-            self.update_view()
-    
-    def zoom_out(self):
-        if self.slide_dimensions[0]:
-            self.zoom = max(self.zoom / 1.5, 0.05)
-            self.lbl_zoom.config(text=f"{int(self.zoom*100)}%")
-            if self.use_openslide:
-                level = self.get_best_level(self.zoom)
-                self.lbl_zoom.config(text=f"{int(self.zoom*100)}% (L{level})")
-            self.update_view()
-    
-    def pan(self, e):
-        if self.slide_dimensions[0] and hasattr(self, 'pan_start'):
-            dx = (self.pan_start[0] - e.x) / self.zoom
-            dy = (self.pan_start[1] - e.y) / self.zoom
-            self.offset_x += dx
-            self.offset_y += dy
-            self.pan_start = (e.x, e.y)
-            self.update_view()
-    
-    def reset(self):
-        self.zoom = 1.0
-        self.offset_x = 0
-        self.offset_y = 0
-        self.lbl_zoom.config(text="100%")
-        self.update_view()
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.geometry("1100x750")
-    app = WholeSlideImageViewer(root)
+import concurrent.futures
+import functools
+import io
+import math
+import os
+import sqlite3
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox
+from PIL import Image, ImageTk, ImageDraw
+import numpy as np
+import tifffile
+
+# Decoded regions are read as superblocks aligned to this size (level-0
+# pixels) and cached, so a slow pan keeps hitting the same decoded block
+# instead of re-decoding a slightly different rectangle every frame
+BLOCK = 2048
+
+# OpenSlide's own tile cache (default 32 MiB) re-decodes constantly on
+# large slides; give it 1 GiB when the installed version supports it
+OPENSLIDE_CACHE_BYTES = 1 << 30
+
+# Decoded regions also persist as JPEG blobs in a <slide>.tilecache.db
+# next to the slide, so reopening the same slide starts warm
+DISK_BLOCKS = 2000
+
+def _interleave_bits(x, y):
+    """Spread the bits of x and y into a single Morton (Z-order) index"""
+    z = 0
+    for i in range(16):
+        z |= ((x >> i) & 1) << (2 * i)
+        z |= ((y >> i) & 1) << (2 * i + 1)
+    return z
+
+def _morton_order(n_cols, n_rows):
+    """Yield (col, row) pairs in Z-order so consecutive reads stay in the
+    same decoded slide block instead of sweeping whole rows"""
+    yield from sorted(((c, r) for c in range(n_cols) for r in range(n_rows)),
+                      key=lambda cr: _interleave_bits(cr[0], cr[1]))
+
+def _build_pyramid(image):
+    """Build a power-of-2 pyramid so zoom-out reads cost O(target pixels)
+    instead of cropping the full resolution. Level 0 is the original image;
+    modes reduce() rejects (palette, 1-bit, 16-bit) are converted once for
+    the smaller levels."""
+    im = image
+    if im.mode == 'P':
+        im = im.convert('RGBA' if 'transparency' in im.info else 'RGB')
+    elif im.mode == '1':
+        im = im.convert('L')
+    elif im.mode.startswith('I;16'):
+        im = im.convert('I')
+    pyramid = [image]
+    while min(im.size) > 512:
+        im = im.reduce(2)  # fast box filter
+        pyramid.append(im)
+    return pyramid
+
+# Try to import OpenSlide for whole slide imaging
+try:
+    import openslide
+    OPENSLIDE_AVAILABLE = True
+except ImportError:
+    OPENSLIDE_AVAILABLE = False
+    print("OpenSlide not available. Install with: pip install openslide-python")
+
+class WholeSlideImageViewer:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Whole Slide Image Viewer with Grid")
+        
+        # Image variables
+        self.slide = None  # OpenSlide object
+        self.image = None  # PIL Image (for small images)
+        self._pyramid = None  # Software pyramid for the PIL fallback
+        self.use_openslide = False
+        self.slide_dimensions = (0, 0)
+        self.level_count = 0
+        self.level_dimensions = []
+        self.level_downsamples = []
+        self._ds_log = None  # Precomputed log(downsample) per level
+        self._best_level_memo = None  # Last (zoom, level) answer
+
+        # View variables
+        self.zoom = 1.0
+        self.offset_x = 0
+        self.offset_y = 0
+        self.photo = None
+        self._image_item = None  # Persistent canvas item holding self.photo
+        self._base_region = None  # Last decoded region (before grid overlay)
+        self._base_key = None
+        self._interactive = False  # True while a pan/zoom gesture is running
+        self._hq_after_id = None
+        self._redraw_pending = False
+        self._prefetch_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self._inflight = set()  # Prefetches that may still read self.slide
+        self._prefetch_level = None
+        self._prefetch_gen = 0  # Bumped when a zoom change invalidates the level
+        self._scratch_draw = None  # Persistent ImageDraw used only for text measuring
+        self._disk_cache = None  # sqlite connection for the on-disk tile cache
+        self._disk_mtime = 0
+        self._disk_lock = threading.Lock()
+        self.show_grid = True
+        self.grid_size = 5000  # Larger default for WSI
+        self.max_cols = 0
+        self.max_rows = 0
+        
+        self.setup_ui()
+        
+    def setup_ui(self):
+        # Top controls
+        top = tk.Frame(self.root)
+        top.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+        
+        tk.Button(top, text="Load Image", command=self.load_image, 
+                 width=12, bg='lightblue').pack(side=tk.LEFT, padx=2)
+        tk.Button(top, text="Grid ON/OFF", command=self.toggle_grid, width=10).pack(side=tk.LEFT, padx=2)
+        
+        tk.Label(top, text="Grid Size:").pack(side=tk.LEFT, padx=5)
+        for size in [1000, 2000, 5000, 10000]:
+            tk.Button(top, text=str(size), command=lambda s=size: self.set_grid_size(s), 
+                     width=6).pack(side=tk.LEFT, padx=1)
+        
+        tk.Label(top, text="Zoom:").pack(side=tk.LEFT, padx=5)
+        tk.Button(top, text="-", command=self.zoom_out, width=3).pack(side=tk.LEFT)
+        self.lbl_zoom = tk.Label(top, text="100%", width=8, relief=tk.SUNKEN)
+        self.lbl_zoom.pack(side=tk.LEFT)
+        tk.Button(top, text="+", command=self.zoom_in, width=3).pack(side=tk.LEFT)
+        
+        tk.Button(top, text="Reset", command=self.reset, width=6).pack(side=tk.LEFT, padx=10)
+        
+        self.lbl_sector = tk.Label(top, text="Sector: -", fg='blue', font=('Arial', 9, 'bold'))
+        self.lbl_sector.pack(side=tk.RIGHT, padx=10)
+        
+        # Main area
+        main = tk.Frame(self.root)
+        main.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Canvas
+        self.canvas = tk.Canvas(main, bg='gray')
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Side panel
+        side = tk.Frame(main, width=260, relief=tk.RAISED, bd=2)
+        side.pack(side=tk.RIGHT, fill=tk.Y, padx=(5,0))
+        side.pack_propagate(False)
+        
+        tk.Label(side, text="Sector Navigator", font=('Arial', 12, 'bold')).pack(pady=15)
+        
+        # Sector selector
+        selector_frame = tk.LabelFrame(side, text="Go to Sector", font=('Arial', 10, 'bold'))
+        selector_frame.pack(padx=10, pady=10, fill=tk.X)
+        
+        col_frame = tk.Frame(selector_frame)
+        col_frame.pack(pady=8, padx=10, fill=tk.X)
+        tk.Label(col_frame, text="Column:", font=('Arial', 9, 'bold'), width=8, anchor='w').pack(side=tk.LEFT)
+        self.spin_col = tk.Spinbox(col_frame, from_=0, to=0, width=8, font=('Arial', 10))
+        self.spin_col.pack(side=tk.LEFT, padx=5)
+        
+        row_frame = tk.Frame(selector_frame)
+        row_frame.pack(pady=8, padx=10, fill=tk.X)
+        tk.Label(row_frame, text="Row:", font=('Arial', 9, 'bold'), width=8, anchor='w').pack(side=tk.LEFT)
+        self.spin_row = tk.Spinbox(row_frame, from_=0, to=0, width=8, font=('Arial', 10))
+        self.spin_row.pack(side=tk.LEFT, padx=5)
+        
+        tk.Button(selector_frame, text="GO TO SECTOR", command=self.goto_sector, 
+                 bg='lightgreen', width=18, font=('Arial', 10, 'bold'), height=2).pack(pady=15)
+        
+        tk.Label(side, text="─" * 38).pack(pady=10)
+        
+        # Image info
+        info_frame = tk.LabelFrame(side, text="Image Information", font=('Arial', 10, 'bold'))
+        info_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        
+        self.lbl_info = tk.Label(info_frame, text="No image loaded", fg='gray', 
+                                 wraplength=230, justify=tk.LEFT, font=('Arial', 8))
+        self.lbl_info.pack(pady=10, padx=10, anchor='w')
+        
+        # Status
+        self.lbl_status = tk.Label(side, text="", fg='green', font=('Arial', 8, 'italic'))
+        self.lbl_status.pack(pady=5)
+        
+        # Navigation help
+        tk.Label(side, text="Navigation:", font=('Arial', 9, 'bold')).pack(pady=(10,5))
+        tk.Label(side, text="• Drag to pan", font=('Arial', 8)).pack(anchor='w', padx=20)
+        tk.Label(side, text="• Mouse wheel to zoom", font=('Arial', 8)).pack(anchor='w', padx=20)
+        tk.Label(side, text="• Pyramid levels auto-selected", font=('Arial', 8)).pack(anchor='w', padx=20)
+        
+        # Bindings
+        self.canvas.bind("<ButtonPress-1>", lambda e: setattr(self, 'pan_start', (e.x, e.y)))
+        self.canvas.bind("<B1-Motion>", self.pan)
+        self.canvas.bind("<MouseWheel>", lambda e: self.zoom_in() if e.delta > 0 else self.zoom_out())
+        self.canvas.bind("<Button-4>", lambda e: self.zoom_in())
+        self.canvas.bind("<Button-5>", lambda e: self.zoom_out())
+        
+    def load_image(self):
+        path = filedialog.askopenfilename(
+            filetypes=[
+                ("Whole Slide", "*.ndpi *.svs *.tif *.tiff *.vms *.vmu *.scn *.mrxs *.bif"),
+                ("All Images", "*.png *.jpg *.jpeg *.bmp"),
+                ("All", "*.*")
+            ])
+        if not path:
+            return
+
+        # Heavy decode runs off the Tk thread so the UI stays responsive
+        self.lbl_status.config(text="Loading image...", fg='blue')
+        threading.Thread(target=self._load_worker, args=(path,), daemon=True).start()
+
+    def _load_worker(self, path):
+        """Open the slide/image in a worker thread, post the result back"""
+        try:
+            slide = None
+            image = None
+
+            # Try OpenSlide first for WSI formats
+            if OPENSLIDE_AVAILABLE and path.lower().endswith(('.ndpi', '.svs', '.vms', '.vmu', '.scn', '.mrxs', '.tif', '.tiff', '.bif')):
+                try:
+                    slide = openslide.OpenSlide(path)
+                except openslide.OpenSlideError:
+                    # If OpenSlide fails, try regular image loading
+                    slide = None
+
+            # Fallback to PIL/tifffile for regular images
+            pyramid = None
+            if slide is None:
+                if path.endswith(('.tif', '.tiff')):
+                    image = Image.fromarray(tifffile.imread(path))
+                else:
+                    image = Image.open(path)
+                # Build the pyramid here too: the first reduce forces the
+                # full decode, which must not run on the Tk thread
+                pyramid = _build_pyramid(image)
+
+            self.root.after(0, self._on_loaded, slide, image, path, pyramid)
+        except Exception as e:
+            self.root.after(0, self._on_load_error, e)
+
+    def _open_disk_cache(self, path):
+        """Open the per-slide tile cache database (RAM -> disk -> OpenSlide)"""
+        with self._disk_lock:
+            if self._disk_cache is not None:
+                self._disk_cache.close()
+                self._disk_cache = None
+            try:
+                mtime = int(os.path.getmtime(path))
+                db = sqlite3.connect(f"{path}.tilecache.db", check_same_thread=False)
+                db.execute("CREATE TABLE IF NOT EXISTS tiles "
+                           "(key TEXT PRIMARY KEY, mtime INTEGER, jpeg BLOB)")
+                # Entries from an older version of the slide file are stale
+                db.execute("DELETE FROM tiles WHERE mtime != ?", (mtime,))
+                db.commit()
+                self._disk_cache = db
+                self._disk_mtime = mtime
+            except Exception:
+                self._disk_cache = None  # Cache is optional; read-only dirs etc.
+
+    def _disk_cache_get(self, key):
+        with self._disk_lock:
+            if self._disk_cache is None:
+                return None
+            row = self._disk_cache.execute(
+                "SELECT jpeg FROM tiles WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        img = Image.open(io.BytesIO(row[0]))
+        img.load()
+        return img
+
+    def _disk_cache_put(self, key, img):
+        if self._disk_cache is None:
+            return
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=90)
+        with self._disk_lock:
+            if self._disk_cache is None:
+                return
+            self._disk_cache.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?)",
+                (key, self._disk_mtime, buf.getvalue()))
+            # Keep only the newest DISK_BLOCKS entries
+            self._disk_cache.execute(
+                "DELETE FROM tiles WHERE rowid IN "
+                "(SELECT rowid FROM tiles ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                (DISK_BLOCKS,))
+            self._disk_cache.commit()
+
+    def _close_when_drained(self, old_slide, pending):
+        """Close a replaced slide once outstanding prefetch reads are done
+
+        OpenSlide forbids closing a handle that other threads are still
+        reading, so the wait runs on a helper thread off the Tk loop.
+        """
+        def _drain():
+            concurrent.futures.wait(pending)
+            old_slide.close()
+            # Prefetches that were already running may have repopulated the
+            # LRU with old-slide pixels; clear it again now they are done
+            self._read_region_cached.cache_clear()
+        threading.Thread(target=_drain, daemon=True).start()
+
+    def _on_loaded(self, slide, image, path, pyramid):
+        """Install the freshly loaded slide/image (runs on the Tk thread)"""
+        # Invalidate prefetches before touching the old handle, then defer
+        # its close until in-flight reads have finished with it
+        self._prefetch_level = None
+        self._prefetch_gen += 1
+        if self.slide:
+            self._close_when_drained(self.slide, list(self._inflight))
+        if slide is not None:
+            self._open_disk_cache(path)
+        self.slide = slide
+        self.image = image
+        self._pyramid = None
+        self._base_region = None
+        self._base_key = None
+        self._best_level_memo = None
+        self._read_region_cached.cache_clear()
+
+        if slide is not None:
+            try:
+                slide.set_cache(openslide.OpenSlideCache(OPENSLIDE_CACHE_BYTES))
+            except AttributeError:
+                pass  # openslide-python < 1.3 has no cache API
+            self.use_openslide = True
+            self.slide_dimensions = slide.dimensions
+            self.level_count = slide.level_count
+            self.level_dimensions = slide.level_dimensions
+            self.level_downsamples = slide.level_downsamples
+            self._ds_log = np.log(np.asarray(self.level_downsamples))
+            self.lbl_status.config(text=f"✓ Using OpenSlide ({self.level_count} pyramid levels)", fg='green')
+        else:
+            self.use_openslide = False
+            self.slide_dimensions = (image.width, image.height)
+            # The software pyramid was built in the load worker
+            self._pyramid = pyramid
+            self.lbl_status.config(text="✓ Using PIL/tifffile (standard loading)", fg='orange')
+
+        self.update_info()
+        self.reset()
+        messagebox.showinfo("Success",
+            f"Image loaded successfully\n"
+            f"Size: {self.slide_dimensions[0]} x {self.slide_dimensions[1]} px\n"
+            f"Method: {'OpenSlide' if self.use_openslide else 'Standard'}")
+
+    def _on_load_error(self, e):
+        messagebox.showerror("Error", f"Could not load image:\n{str(e)}")
+        self.lbl_status.config(text="✗ Error loading image", fg='red')
+    
+    def update_info(self):
+        if not self.slide_dimensions[0]:
+            return
+        
+        w, h = self.slide_dimensions
+        self.max_cols = (w + self.grid_size - 1) // self.grid_size
+        self.max_rows = (h + self.grid_size - 1) // self.grid_size
+        
+        self.spin_col.config(from_=0, to=max(0, self.max_cols-1))
+        self.spin_row.config(from_=0, to=max(0, self.max_rows-1))
+        
+        info_text = f"Dimensions:\n  {w:,} x {h:,} px\n\n"
+        info_text += f"File size: {w * h / 1e6:.1f} megapixels\n\n"
+        info_text += f"Grid Cell: {self.grid_size:,} px\n\n"
+        info_text += f"Grid Layout:\n  {self.max_cols} cols x {self.max_rows} rows\n\n"
+        info_text += f"Total Sectors: {self.max_cols * self.max_rows}\n\n"
+        
+        if self.use_openslide:
+            info_text += f"Pyramid Levels: {self.level_count}\n"
+            info_text += f"Magnification: {self.slide.properties.get(openslide.PROPERTY_NAME_OBJECTIVE_POWER, 'N/A')}\n"
+        
+        self.lbl_info.config(text=info_text)
+    
+    def get_best_level(self, zoom):
+        """Select best pyramid level based on zoom"""
+        if not self.use_openslide:
+            return 0
+
+        # Short-circuit repeated queries at the same zoom
+        if self._best_level_memo is not None and self._best_level_memo[0] == zoom:
+            return self._best_level_memo[1]
+
+        # Binary-search the precomputed log downsamples for 1/zoom
+        target = -math.log(zoom)
+        idx = int(np.searchsorted(self._ds_log, target))
+        if idx >= len(self._ds_log):
+            idx = len(self._ds_log) - 1
+        elif idx > 0 and abs(self._ds_log[idx - 1] - target) <= abs(self._ds_log[idx] - target):
+            idx -= 1
+
+        self._best_level_memo = (zoom, idx)
+        return idx
+    
+    # Entries are whole superblocks (a level-0 read spanning block
+    # boundaries can reach 4096x4096 px, ~48 MB decoded), so keep the
+    # LRU small; OpenSlide's own 1 GiB cache sits underneath it anyway
+    @functools.lru_cache(maxsize=8)
+    def _read_region_cached(self, x, y, width, height, level):
+        """Decode a tile-aligned region (cache hits skip the JPEG/JP2K decode)"""
+        # Second tier: decoded tiles persisted on disk by a previous session
+        key = f"{level}:{x}:{y}:{width}:{height}"
+        cached = self._disk_cache_get(key)
+        if cached is not None:
+            return cached
+
+        downsample = self.level_downsamples[level]
+        level_width = int(width / downsample)
+        level_height = int(height / downsample)
+        region = self.slide.read_region((x, y), level, (level_width, level_height))
+        # Drop the alpha channel with a numpy slice instead of PIL's
+        # convert('RGB'), which allocates and copies a whole extra buffer
+        region = Image.fromarray(np.asarray(region)[..., :3], 'RGB')
+        self._disk_cache_put(key, region)
+        return region
+
+    def read_region(self, x, y, width, height, zoom, resample=Image.Resampling.LANCZOS):
+        """Read a region from the image at given zoom"""
+        if self.use_openslide:
+            level = self.get_best_level(zoom)
+            downsample = self.level_downsamples[level]
+
+            # Round the read up to BLOCK-aligned superblocks; the extra
+            # pixels around the viewport are kept for the next frames
+            x0 = (int(x) // BLOCK) * BLOCK
+            y0 = (int(y) // BLOCK) * BLOCK
+            x1 = ((int(x + width) + BLOCK - 1) // BLOCK) * BLOCK
+            y1 = ((int(y + height) + BLOCK - 1) // BLOCK) * BLOCK
+
+            region = self._read_region_cached(x0, y0, x1 - x0, y1 - y0, level)
+
+            # Crop the exact viewport out of the snapped region (level coords)
+            crop_x = int((x - x0) / downsample)
+            crop_y = int((y - y0) / downsample)
+            region = region.crop((crop_x, crop_y,
+                                  crop_x + int(width / downsample),
+                                  crop_y + int(height / downsample)))
+
+            # Scale to desired size, but only when the decoded level size
+            # differs from the target (near-native zoom needs no resample)
+            target_width = int(width * zoom)
+            target_height = int(height * zoom)
+            if region.size != (target_width, target_height):
+                if (resample == Image.Resampling.LANCZOS
+                        and target_width < region.width and target_height < region.height):
+                    # BOX is much cheaper than LANCZOS for pure downscale
+                    resample = Image.Resampling.BOX
+                region = region.resize((target_width, target_height), resample)
+
+            return region
+        else:
+            # Crop from the closest software pyramid level so zoom-out
+            # touches O(target) pixels rather than the full resolution
+            level = 0
+            if self._pyramid and zoom < 1:
+                level = min(len(self._pyramid) - 1, int(-math.log2(zoom)))
+            src = self._pyramid[level] if self._pyramid else self.image
+            scale = 1 << level
+
+            x2 = min(x + width, self.image.width)
+            y2 = min(y + height, self.image.height)
+            region = src.crop((int(x / scale), int(y / scale),
+                               int(x2 / scale), int(y2 / scale)))
+            target_w = int((x2 - x) * zoom)
+            target_h = int((y2 - y) * zoom)
+            if region.size != (target_w, target_h):
+                region = region.resize((target_w, target_h), resample)
+            return region
+    
+    def draw_grid_canvas(self):
+        """Draw the grid as native Tk canvas items (no per-frame RGBA raster)"""
+        self.canvas.delete('grid')
+        if not self.show_grid:
+            return
+
+        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
+        cell = self.grid_size * self.zoom
+        ox = (self.offset_x % self.grid_size) * self.zoom
+        oy = (self.offset_y % self.grid_size) * self.zoom
+
+        first_col = int(self.offset_x // self.grid_size)
+        first_row = int(self.offset_y // self.grid_size)
+
+        # Vertical lines
+        x, col = -ox, first_col
+        while x < w:
+            if x >= 0:
+                self.canvas.create_line(x, 0, x, h, fill='yellow', width=3, tags='grid')
+                if x > 30:
+                    self.canvas.create_text(x, 14, text=f"Col {col}", fill='yellow',
+                                            font=('Arial', 9, 'bold'), tags='grid')
+            x += cell
+            col += 1
+
+        # Horizontal lines
+        y, row = -oy, first_row
+        while y < h:
+            if y >= 0:
+                self.canvas.create_line(0, y, w, y, fill='yellow', width=3, tags='grid')
+                if y > 30:
+                    self.canvas.create_text(32, y, text=f"Row {row}", fill='yellow',
+                                            font=('Arial', 9, 'bold'), tags='grid')
+            y += cell
+            row += 1
+
+        # Sector labels (only if zoom is reasonable)
+        if self.zoom >= 0.3:
+            x_start, col = -ox + cell/2, first_col
+            while x_start < w + cell:
+                y_start, row = -oy + cell/2, first_row
+                while y_start < h + cell:
+                    if 0 < x_start < w and 0 < y_start < h:
+                        if col < self.max_cols and row < self.max_rows:
+                            self.canvas.create_text(x_start, y_start,
+                                                    text=f"Sector\n({col},{row})",
+                                                    fill='white', justify=tk.CENTER,
+                                                    tags='grid')
+                    y_start += cell
+                    row += 1
+                x_start += cell
+                col += 1
+
+    @functools.lru_cache(maxsize=4096)
+    def _measure(self, text):
+        """Memoized textbbox - grid labels repeat the same few strings"""
+        if self._scratch_draw is None:
+            self._scratch_draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        return self._scratch_draw.textbbox((0, 0), text)
+
+    def draw_grid(self, img):
+        """Rasterize the grid into a PIL image (kept for the offline/export path)"""
+        if not self.show_grid:
+            return img
+
+        # Normalize to RGB so the 3-channel line stores below work for any
+        # source mode (RGBA PNGs, palette images); this is also the copy
+        # that protects the caller's image
+        img = img.convert('RGB')
+
+        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
+        cell = self.grid_size * self.zoom
+        ox = (self.offset_x % self.grid_size) * self.zoom
+        oy = (self.offset_y % self.grid_size) * self.zoom
+
+        first_col = int(self.offset_x // self.grid_size)
+        first_row = int(self.offset_y // self.grid_size)
+
+        # All line positions in two arange calls
+        n_v = int(w // cell) + 2
+        n_h = int(h // cell) + 2
+        xs = -ox + np.arange(n_v) * cell
+        ys = -oy + np.arange(n_h) * cell
+        cols = first_col + np.arange(n_v)
+        rows = first_row + np.arange(n_h)
+        x_keep = (xs >= 0) & (xs <= img.width)
+        y_keep = (ys >= 0) & (ys <= img.height)
+        xs, cols = xs[x_keep].astype(int), cols[x_keep]
+        ys, rows = ys[y_keep].astype(int), rows[y_keep]
+
+        # Write the 3 px lines straight into the pixel array: one
+        # vectorized store per line instead of a PIL primitive call
+        arr = np.array(img)
+        for x in xs:
+            arr[:, x:x+3] = (255, 255, 0)
+        for y in ys:
+            arr[y:y+3, :] = (255, 255, 0)
+        img = Image.fromarray(arr)
+
+        # Labels still go through ImageDraw (text needs FreeType)
+        draw = ImageDraw.Draw(img, 'RGBA')
+        for x, col in zip(xs, cols):
+            if x > 30:
+                t = f"Col {col}"
+                bbox = self._measure(t)
+                tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+                draw.rectangle([x-tw//2-5, 5, x+tw//2+5, 5+th+10], fill=(0,0,0,220))
+                draw.text((x-tw//2, 8), t, fill=(255,255,0,255))
+        for y, row in zip(ys, rows):
+            if y > 30:
+                t = f"Row {row}"
+                bbox = self._measure(t)
+                tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+                draw.rectangle([5, y-th//2-5, 5+tw+10, y+th//2+5], fill=(0,0,0,220))
+                draw.text((8, y-th//2), t, fill=(255,255,0,255))
+
+
+        # Sector labels (only if zoom is reasonable)
+        if self.zoom >= 0.3:
+            # Every label shares the same template, so measure it once
+            # instead of per cell
+            bbox = self._measure("Sector")
+            line_height = bbox[3] - bbox[1]
+            max_width = max(bbox[2] - bbox[0],
+                            self._measure(f"({self.max_cols},{self.max_rows})")[2])
+            total_height = 2 * (line_height + 2)
+            padding = 8
+
+            # Precompute all candidate cell centers, mask the visible ones
+            n_x = int((w + cell) // cell) + 2
+            n_y = int((h + cell) // cell) + 2
+            xs = -ox + cell / 2 + np.arange(n_x) * cell
+            ys = -oy + cell / 2 + np.arange(n_y) * cell
+            cols = first_col + np.arange(n_x)
+            rows = first_row + np.arange(n_y)
+            x_ok = (xs > 0) & (xs < img.width) & (cols < self.max_cols)
+            y_ok = (ys > 0) & (ys < img.height) & (rows < self.max_rows)
+
+            for x_start, col in zip(xs[x_ok], cols[x_ok]):
+                for y_start, row in zip(ys[y_ok], rows[y_ok]):
+                    draw.rectangle([
+                        x_start - max_width//2 - padding,
+                        y_start - total_height//2 - padding,
+                        x_start + max_width//2 + padding,
+                        y_start + total_height//2 + padding
+                    ], fill=(50, 50, 50, 180))
+                    draw.text((x_start - max_width//2, y_start - total_height//2),
+                              f"Sector\n({col},{row})",
+                              fill=(255,255,255,255), align='center')
+
+        return img
+    
+    def update_view(self):
+        if not self.slide_dimensions[0]:
+            return
+        
+        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
+        view_w = int(w / self.zoom)
+        view_h = int(h / self.zoom)
+        
+        max_w, max_h = self.slide_dimensions
+        view_w = min(view_w, max_w)
+        view_h = min(view_h, max_h)
+        
+        self.offset_x = max(0, min(self.offset_x, max_w - view_w))
+        self.offset_y = max(0, min(self.offset_y, max_h - view_h))
+        
+        # Snap the read origin to whole pixels aligned to the level's
+        # downsample, so consecutive frames produce identical cache keys
+        # (fractional offsets from pan would defeat the region cache)
+        snap = 1
+        if self.use_openslide:
+            snap = max(1, int(self.level_downsamples[self.get_best_level(self.zoom)]))
+        ox = (int(self.offset_x) // snap) * snap
+        oy = (int(self.offset_y) // snap) * snap
+
+        # Read region on demand, but reuse the last decoded base image when
+        # only the overlay changed (e.g. grid toggled on/off)
+        # Fast resampling while a gesture is active, high quality once settled
+        resample = Image.Resampling.NEAREST if self._interactive else Image.Resampling.LANCZOS
+        key = (ox, oy, view_w, view_h, round(self.zoom, 4), self._interactive)
+        if key != self._base_key or self._base_region is None:
+            self._base_region = self.read_region(ox, oy, view_w, view_h,
+                                                 self.zoom, resample)
+            self._base_key = key
+
+        # Reuse the Tk-side image buffer; reallocate only when the rendered
+        # size changes (zoom step or window resize)
+        region = self._base_region
+        if (self.photo is None or self._image_item is None
+                or (self.photo.width(), self.photo.height()) != region.size):
+            self.photo = ImageTk.PhotoImage(region)
+            if self._image_item is not None:
+                self.canvas.delete(self._image_item)
+            self._image_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+            self.canvas.tag_lower(self._image_item)
+        else:
+            self.photo.paste(region)
+        # Apply the sub-snap residual by moving the image item, not re-reading
+        self.canvas.coords(self._image_item,
+                           -(self.offset_x - ox) * self.zoom,
+                           -(self.offset_y - oy) * self.zoom)
+        self.draw_grid_canvas()
+        
+        # Update sector
+        cx = self.offset_x + (view_w / 2)
+        cy = self.offset_y + (view_h / 2)
+        col = int(cx // self.grid_size)
+        row = int(cy // self.grid_size)
+        self.lbl_sector.config(text=f"Sector: (Col {col}, Row {row})")
+
+        # Warm the cache for the regions the user is likely to pan into
+        self._prefetch_neighbors(view_w, view_h)
+
+    def _prefetch_neighbors(self, view_w, view_h):
+        """Speculatively decode the 8 neighbor regions in the background"""
+        if not self.use_openslide:
+            return
+
+        level = self.get_best_level(self.zoom)
+        if level != self._prefetch_level:
+            # Zoom moved to another pyramid level; stale jobs stop early
+            self._prefetch_gen += 1
+            self._prefetch_level = level
+
+        # Submit the 3x3 window in Z-order so speculative decodes keep
+        # 2D locality in the tile caches
+        for i, j in _morton_order(3, 3):
+            dx, dy = (i - 1) * view_w, (j - 1) * view_h
+            if dx == 0 and dy == 0:
+                continue
+            x = self.offset_x + dx
+            y = self.offset_y + dy
+            if (x < 0 or y < 0 or
+                    x >= self.slide_dimensions[0] or y >= self.slide_dimensions[1]):
+                continue
+            fut = self._prefetch_pool.submit(self._prefetch_region, x, y,
+                                             view_w, view_h, level, self._prefetch_gen)
+            # Remember the job until it finishes so a slide swap can wait
+            # for reads that still target the old handle
+            self._inflight.add(fut)
+            fut.add_done_callback(self._inflight.discard)
+
+    def _prefetch_region(self, x, y, width, height, level, gen):
+        if gen != self._prefetch_gen:
+            return
+        x0 = (int(x) // BLOCK) * BLOCK
+        y0 = (int(y) // BLOCK) * BLOCK
+        x1 = ((int(x + width) + BLOCK - 1) // BLOCK) * BLOCK
+        y1 = ((int(y + height) + BLOCK - 1) // BLOCK) * BLOCK
+        try:
+            # Cache hits return immediately, so already-decoded jobs are free
+            self._read_region_cached(x0, y0, x1 - x0, y1 - y0, level)
+        except Exception:
+            pass  # Prefetch is best-effort; the foreground read reports errors
+    
+    def iterate_sectors_zorder(self):
+        """Yield (col, row) for every sector in Z-order; bulk operations
+        (export, batch analysis) should read sectors in this order to
+        maximize tile cache hits"""
+        yield from _morton_order(self.max_cols, self.max_rows)
+
+    def toggle_grid(self):
+        self.show_grid = not self.show_grid
+        self.update_view()
+    
+    def set_grid_size(self, size):
+        self.grid_size = size
+        self._measure.cache_clear()
+        self.update_info()
+        self.update_view()
+    
+    def goto_sector(self):
+        if not self.slide_dimensions[0]:
+            messagebox.showwarning("Warning", "Load an image first")
+            return
+        try:
+            col = int(self.spin_col.get())
+            row = int(self.spin_row.get())
+            
+            if col < 0 or col >= self.max_cols or row < 0 or row >= self.max_rows:
+                messagebox.showerror("Error", 
+                    f"Out of bounds! Valid: Col 0-{self.max_cols-1}, Row 0-{self.max_rows-1}")
+                return
+            
+            cx = (col * self.grid_size) + (self.grid_size / 2)
+            cy = (row * self.grid_size) + (self.grid_size / 2)
+            
+            w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
+            self.offset_x = cx - (w/self.zoom/2)
+            self.offset_y = cy - (h/self.zoom/2)
+            self.update_view()
+        except ValueError:
+            messagebox.showerror("Error", "Invalid values")
+    
+    def _request_redraw(self):
+        """Coalesce bursts of pan/zoom events into one render per idle cycle"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.root.after_idle(self._do_redraw)
+
+    def _do_redraw(self):
+        self._redraw_pending = False
+        self.update_view()
+
+    def _schedule_finalize(self):
+        """Re-render once in high quality after the gesture stops"""
+        if self._hq_after_id is not None:
+            self.root.after_cancel(self._hq_after_id)
+        self._hq_after_id = self.root.after(150, self._finalize_render)
+
+    def _finalize_render(self):
+        self._hq_after_id = None
+        self._interactive = False
+        self.update_view()
+
+    def zoom_in(self):
+        if self.slide_dimensions[0]:
+            self.zoom = min(self.zoom * 1.5, 10.0)
+            self.lbl_zoom.config(text=f"{int(self.zoom*100)}%")
+            if self.use_openslide:
+                level = self.get_best_level(self.zoom)
+                self.lbl_zoom.config(text=f"{int(self.zoom*100)}% (L{level})")
+            self._interactive = True
+            self._request_redraw()
+            self._schedule_finalize()
+
+    def zoom_out(self):
+        if self.slide_dimensions[0]:
+            self.zoom = max(self.zoom / 1.5, 0.05)
+            self.lbl_zoom.config(text=f"{int(self.zoom*100)}%")
+            if self.use_openslide:
+                level = self.get_best_level(self.zoom)
+                self.lbl_zoom.config(text=f"{int(self.zoom*100)}% (L{level})")
+            self._interactive = True
+            self._request_redraw()
+            self._schedule_finalize()
+
+    def pan(self, e):
+        if self.slide_dimensions[0] and hasattr(self, 'pan_start'):
+            dx = (self.pan_start[0] - e.x) / self.zoom
+            dy = (self.pan_start[1] - e.y) / self.zoom
+            self.offset_x += dx
+            self.offset_y += dy
+            self.pan_start = (e.x, e.y)
+            self._interactive = True
+            self._request_redraw()
+            self._schedule_finalize()
+    
+    def reset(self):
+        self.zoom = 1.0
+        self.offset_x = 0
+        self.offset_y = 0
+        self.lbl_zoom.config(text="100%")
+        self.update_view()
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.geometry("1100x750")
+    app = WholeSlideImageViewer(root)
     root.mainloop()
\ No newline at end of file
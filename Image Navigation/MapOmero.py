@@ -1,453 +1,868 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk, ImageDraw
-import numpy as np
-import tifffile
-
-try:
-    import openslide
-    OPENSLIDE_AVAILABLE = True
-except ImportError:
-    OPENSLIDE_AVAILABLE = False
-    print("OpenSlide not available. Install: pip install openslide-python")
-
-class WSITrackingViewer:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("WSI Viewer with Tracking Map")
-        
-        # Image variables
-        self.slide = None
-        self.image = None
-        self.use_openslide = False
-        self.slide_dimensions = (0, 0)
-        self.level_count = 0
-        self.level_dimensions = []
-        self.level_downsamples = []
-        
-        # View variables
-        self.zoom = 1.0
-        self.offset_x = 0
-        self.offset_y = 0
-        self.photo = None
-        
-        # Tracking variables - by percentage
-        self.tracking_levels = [10, 40, 60, 80]
-        self.tracking_grids = {10: None, 40: None, 60: None, 80: None}
-        self.tracking_colors = {
-            10: (0, 200, 0, 100),      # Green - low zoom
-            40: (0, 100, 255, 100),    # Blue
-            60: (255, 165, 0, 100),    # Orange
-            80: (255, 0, 0, 100)       # Red - high zoom
-        }
-        self.grid_cell_size = 100  # Size of tracking grid cells in pixels
-        
-        # Map variables
-        self.map_thumbnail = None
-        self.map_scale_x = 1.0
-        self.map_scale_y = 1.0
-        self.tracking_overlay = None
-        self.viewport_rect = None
-        
-        self.setup_ui()
-        
-    def setup_ui(self):
-        # Top controls
-        top = tk.Frame(self.root)
-        top.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
-        
-        tk.Button(top, text="Load Image", command=self.load_image, 
-                 width=12, bg='lightblue').pack(side=tk.LEFT, padx=2)
-        
-        tk.Label(top, text="Quick Zoom:").pack(side=tk.LEFT, padx=5)
-        for percent in [10, 40, 60, 80]:
-            color = {10: 'lightgreen', 40: 'lightblue', 60: 'orange', 80: 'salmon'}[percent]
-            tk.Button(top, text=f"{percent}%", 
-                     command=lambda p=percent: self.set_zoom_percent(p), 
-                     width=5, bg=color).pack(side=tk.LEFT, padx=1)
-        
-        tk.Button(top, text="-", command=self.zoom_out, width=3).pack(side=tk.LEFT, padx=(10,0))
-        self.lbl_zoom = tk.Label(top, text="100%", width=8, relief=tk.SUNKEN, 
-                                 font=('Arial', 9, 'bold'))
-        self.lbl_zoom.pack(side=tk.LEFT)
-        tk.Button(top, text="+", command=self.zoom_in, width=3).pack(side=tk.LEFT)
-        
-        tk.Button(top, text="Reset", command=self.reset, width=6).pack(side=tk.LEFT, padx=10)
-        tk.Button(top, text="Clear Tracking", command=self.clear_tracking, 
-                 width=12, bg='lightyellow').pack(side=tk.LEFT, padx=2)
-        
-        self.lbl_info = tk.Label(top, text="", fg='gray')
-        self.lbl_info.pack(side=tk.RIGHT, padx=10)
-        
-        # Main area
-        main = tk.Frame(self.root)
-        main.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Canvas
-        canvas_frame = tk.Frame(main, relief=tk.SUNKEN, bd=2)
-        canvas_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        self.canvas = tk.Canvas(canvas_frame, bg='gray')
-        self.canvas.pack(fill=tk.BOTH, expand=True)
-        
-        # Side panel
-        side = tk.Frame(main, width=320, relief=tk.RAISED, bd=2)
-        side.pack(side=tk.RIGHT, fill=tk.Y, padx=(5,0))
-        side.pack_propagate(False)
-        
-        tk.Label(side, text="Navigation Map", font=('Arial', 11, 'bold')).pack(pady=10)
-        
-        # Map canvas
-        self.canvas_map = tk.Canvas(side, width=300, height=300, bg='lightgray', 
-                                    relief=tk.SUNKEN, bd=2)
-        self.canvas_map.pack(padx=10, pady=10)
-        
-        tk.Label(side, text="Click map to navigate", font=('Arial', 8, 'italic'), 
-                fg='gray').pack()
-        
-        # Legend
-        legend_frame = tk.LabelFrame(side, text="Tracking Legend", font=('Arial', 10, 'bold'))
-        legend_frame.pack(padx=10, pady=15, fill=tk.X)
-        
-        tk.Label(legend_frame, text="Visited areas by zoom level:", 
-                font=('Arial', 8)).pack(pady=(5,8))
-        
-        for percent in [10, 40, 60, 80]:
-            lf = tk.Frame(legend_frame)
-            lf.pack(anchor='w', padx=15, pady=3)
-            color_rgb = self.tracking_colors[percent][:3]
-            color_hex = '#%02x%02x%02x' % color_rgb
-            canvas_color = tk.Canvas(lf, width=25, height=18, bg=color_hex, 
-                                    relief=tk.SOLID, borderwidth=1)
-            canvas_color.pack(side=tk.LEFT)
-            tk.Label(lf, text=f" {percent}% zoom", font=('Arial', 9)).pack(side=tk.LEFT)
-        
-        # Info
-        info_frame = tk.LabelFrame(side, text="Image Info")
-        info_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
-        
-        self.lbl_details = tk.Label(info_frame, text="No image loaded", 
-                                    fg='gray', wraplength=280, justify=tk.LEFT, 
-                                    font=('Arial', 8))
-        self.lbl_details.pack(pady=10, padx=10, anchor='w')
-        
-        # Status
-        self.lbl_status = tk.Label(side, text="", fg='green', font=('Arial', 8, 'italic'))
-        self.lbl_status.pack(pady=5)
-        
-        # Bindings
-        self.canvas.bind("<ButtonPress-1>", lambda e: setattr(self, 'pan_start', (e.x, e.y)))
-        self.canvas.bind("<B1-Motion>", self.pan)
-        self.canvas.bind("<MouseWheel>", lambda e: self.zoom_in() if e.delta > 0 else self.zoom_out())
-        self.canvas.bind("<Button-4>", lambda e: self.zoom_in())
-        self.canvas.bind("<Button-5>", lambda e: self.zoom_out())
-        self.canvas_map.bind("<Button-1>", self.click_map)
-        
-    def load_image(self):
-        path = filedialog.askopenfilename(
-            filetypes=[
-                ("Whole Slide", "*.ndpi *.svs *.tif *.tiff *.vms *.vmu *.scn *.mrxs *.bif"),
-                ("All Images", "*.png *.jpg *.jpeg *.bmp"),
-                ("All", "*.*")
-            ])
-        if not path:
-            return
-        
-        try:
-            if self.slide:
-                self.slide.close()
-            self.slide = None
-            self.image = None
-            self.use_openslide = False
-            
-            # Try OpenSlide
-            if OPENSLIDE_AVAILABLE and path.lower().endswith(('.ndpi', '.svs', '.vms', '.vmu', '.scn', '.mrxs', '.tif', '.tiff', '.bif')):
-                try:
-                    self.slide = openslide.OpenSlide(path)
-                    self.use_openslide = True
-                    self.slide_dimensions = self.slide.dimensions
-                    self.level_count = self.slide.level_count
-                    self.level_dimensions = self.slide.level_dimensions
-                    self.level_downsamples = self.slide.level_downsamples
-                    self.lbl_status.config(text=f"✓ OpenSlide ({self.level_count} levels)", fg='green')
-                except openslide.OpenSlideError:
-                    self.use_openslide = False
-            
-            # Fallback to PIL
-            if not self.use_openslide:
-                if path.endswith(('.tif', '.tiff')):
-                    self.image = Image.fromarray(tifffile.imread(path))
-                else:
-                    self.image = Image.open(path)
-                self.slide_dimensions = (self.image.width, self.image.height)
-                self.lbl_status.config(text="✓ PIL/tifffile", fg='orange')
-            
-            self.initialize_tracking()
-            self.update_info()
-            self.reset()
-            messagebox.showinfo("Success", 
-                f"Loaded: {self.slide_dimensions[0]} x {self.slide_dimensions[1]} px\n"
-                f"Method: {'OpenSlide' if self.use_openslide else 'Standard'}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load:\n{str(e)}")
-            self.lbl_status.config(text="✗ Error", fg='red')
-    
-    def initialize_tracking(self):
-        """Initialize tracking grids"""
-        w, h = self.slide_dimensions
-        grid_w = (w // self.grid_cell_size) + 1
-        grid_h = (h // self.grid_cell_size) + 1
-        
-        for percent in self.tracking_levels:
-            self.tracking_grids[percent] = np.zeros((grid_h, grid_w), dtype=bool)
-    
-    def update_info(self):
-        w, h = self.slide_dimensions
-        info = f"Size: {w:,} x {h:,} px\n"
-        info += f"Megapixels: {w * h / 1e6:.1f}\n\n"
-        if self.use_openslide:
-            info += f"Pyramid Levels: {self.level_count}\n"
-            mag = self.slide.properties.get(openslide.PROPERTY_NAME_OBJECTIVE_POWER, 'N/A')
-            info += f"Magnification: {mag}\n"
-        self.lbl_details.config(text=info)
-        self.lbl_info.config(text=f"{w} x {h} px")
-    
-    def get_best_level(self, zoom):
-        if not self.use_openslide:
-            return 0
-        target_downsample = 1.0 / zoom
-        best_level = 0
-        min_diff = abs(self.level_downsamples[0] - target_downsample)
-        for level, downsample in enumerate(self.level_downsamples):
-            diff = abs(downsample - target_downsample)
-            if diff < min_diff:
-                min_diff = diff
-                best_level = level
-        return best_level
-    
-    def read_region(self, x, y, width, height, zoom):
-        if self.use_openslide:
-            level = self.get_best_level(zoom)
-            downsample = self.level_downsamples[level]
-            level_width = int(width / downsample)
-            level_height = int(height / downsample)
-            region = self.slide.read_region((int(x), int(y)), level, (level_width, level_height))
-            region = region.convert('RGB')
-            target_width = int(width * zoom)
-            target_height = int(height * zoom)
-            region = region.resize((target_width, target_height), Image.Resampling.LANCZOS)
-            return region
-        else:
-            x2 = min(x + width, self.image.width)
-            y2 = min(y + height, self.image.height)
-            region = self.image.crop((int(x), int(y), int(x2), int(y2)))
-            target_w = int((x2 - x) * zoom)
-            target_h = int((y2 - y) * zoom)
-            return region.resize((target_w, target_h), Image.Resampling.LANCZOS)
-    
-    def get_tracking_level(self, zoom_percent):
-        """Get closest tracking level for current zoom percentage"""
-        return min(self.tracking_levels, key=lambda x: abs(x - zoom_percent))
-    
-    def mark_visited(self):
-        """Mark current viewport as visited"""
-        if not self.slide_dimensions[0]:
-            return
-        
-        # Convert zoom to percentage
-        zoom_percent = int(self.zoom * 100)
-        
-        # Find closest tracking level
-        tracking_level = self.get_tracking_level(zoom_percent)
-        
-        if tracking_level not in self.tracking_grids:
-            return
-        
-        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
-        view_w = w / self.zoom
-        view_h = h / self.zoom
-        
-        x1 = int(self.offset_x)
-        y1 = int(self.offset_y)
-        x2 = int(self.offset_x + view_w)
-        y2 = int(self.offset_y + view_h)
-        
-        # Mark grid cells as visited
-        grid_x1 = max(0, x1 // self.grid_cell_size)
-        grid_y1 = max(0, y1 // self.grid_cell_size)
-        grid_x2 = min(self.tracking_grids[tracking_level].shape[1] - 1, x2 // self.grid_cell_size)
-        grid_y2 = min(self.tracking_grids[tracking_level].shape[0] - 1, y2 // self.grid_cell_size)
-        
-        self.tracking_grids[tracking_level][grid_y1:grid_y2+1, grid_x1:grid_x2+1] = True
-    
-    def update_map(self):
-        """Update navigation map with tracking overlay"""
-        if not self.slide_dimensions[0]:
-            return
-        
-        # Create thumbnail
-        if self.use_openslide:
-            # Use lowest resolution level for thumbnail
-            thumb_level = self.level_count - 1
-            thumb_size = self.level_dimensions[thumb_level]
-            thumb = self.slide.read_region((0, 0), thumb_level, thumb_size)
-            thumb = thumb.convert('RGB')
-            thumb.thumbnail((290, 290), Image.Resampling.LANCZOS)
-        else:
-            thumb = self.image.copy()
-            thumb.thumbnail((290, 290), Image.Resampling.LANCZOS)
-        
-        self.map_scale_x = thumb.width / self.slide_dimensions[0]
-        self.map_scale_y = thumb.height / self.slide_dimensions[1]
-        
-        # Create tracking overlay
-        tracking_overlay = Image.new('RGBA', thumb.size, (255, 255, 255, 0))
-        draw = ImageDraw.Draw(tracking_overlay, 'RGBA')
-        
-        # Draw tracking for each percentage level
-        for percent in self.tracking_levels:
-            if self.tracking_grids[percent] is None:
-                continue
-            
-            grid = self.tracking_grids[percent]
-            color = self.tracking_colors[percent]
-            
-            for i in range(grid.shape[0]):
-                for j in range(grid.shape[1]):
-                    if grid[i, j]:
-                        img_x1 = j * self.grid_cell_size
-                        img_y1 = i * self.grid_cell_size
-                        img_x2 = (j + 1) * self.grid_cell_size
-                        img_y2 = (i + 1) * self.grid_cell_size
-                        
-                        map_x1 = img_x1 * self.map_scale_x
-                        map_y1 = img_y1 * self.map_scale_y
-                        map_x2 = img_x2 * self.map_scale_x
-                        map_y2 = img_y2 * self.map_scale_y
-                        
-                        draw.rectangle([map_x1, map_y1, map_x2, map_y2], fill=color)
-        
-        # Composite thumbnail with tracking
-        thumb_rgba = thumb.convert('RGBA')
-        thumb_with_tracking = Image.alpha_composite(thumb_rgba, tracking_overlay)
-        
-        self.map_thumbnail = ImageTk.PhotoImage(thumb_with_tracking)
-        self.canvas_map.delete("all")
-        self.canvas_map.create_image(150, 150, image=self.map_thumbnail)
-        
-        self.update_viewport_rect()
-    
-    def update_viewport_rect(self):
-        """Draw viewport rectangle on map"""
-        if not self.slide_dimensions[0] or not self.map_thumbnail:
-            return
-        
-        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
-        view_w = w / self.zoom
-        view_h = h / self.zoom
-        
-        x1 = (self.offset_x * self.map_scale_x) + (150 - (self.map_thumbnail.width() / 2))
-        y1 = (self.offset_y * self.map_scale_y) + (150 - (self.map_thumbnail.height() / 2))
-        x2 = x1 + (view_w * self.map_scale_x)
-        y2 = y1 + (view_h * self.map_scale_y)
-        
-        if self.viewport_rect:
-            self.canvas_map.delete(self.viewport_rect)
-        
-        self.viewport_rect = self.canvas_map.create_rectangle(
-            x1, y1, x2, y2, outline='white', width=3
-        )
-    
-    def update_view(self):
-        if not self.slide_dimensions[0]:
-            return
-        
-        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
-        view_w = int(w / self.zoom)
-        view_h = int(h / self.zoom)
-        
-        max_w, max_h = self.slide_dimensions
-        view_w = min(view_w, max_w)
-        view_h = min(view_h, max_h)
-        
-        self.offset_x = max(0, min(self.offset_x, max_w - view_w))
-        self.offset_y = max(0, min(self.offset_y, max_h - view_h))
-        
-        # Mark as visited
-        self.mark_visited()
-        
-        # Read and display region
-        region = self.read_region(self.offset_x, self.offset_y, view_w, view_h, self.zoom)
-        self.photo = ImageTk.PhotoImage(region)
-        self.canvas.delete("all")
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
-        
-        # Update map periodically
-        self.update_map()
-    
-    def click_map(self, event):
-        """Navigate by clicking on map"""
-        if not self.slide_dimensions[0] or not self.map_thumbnail:
-            return
-        
-        map_x = event.x - (150 - (self.map_thumbnail.width() / 2))
-        map_y = event.y - (150 - (self.map_thumbnail.height() / 2))
-        
-        img_x = map_x / self.map_scale_x
-        img_y = map_y / self.map_scale_y
-        
-        w, h = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
-        self.offset_x = img_x - (w / self.zoom / 2)
-        self.offset_y = img_y - (h / self.zoom / 2)
-        
-        self.update_view()
-    
-    def set_zoom_percent(self, percent):
-        """Set zoom by percentage"""
-        if self.slide_dimensions[0]:
-            self.zoom = percent / 100.0
-            self.lbl_zoom.config(text=f"{percent}%")
-            self.update_view()
-    
-    def zoom_in(self):
-        if self.slide_dimensions[0]:
-            self.zoom = min(self.zoom * 1.5, 10.0)
-            self.lbl_zoom.config(text=f"{int(self.zoom*100)}%")
-            self.update_view()
-    
-    def zoom_out(self):
-        if self.slide_dimensions[0]:
-            self.zoom = max(self.zoom / 1.5, 0.05)
-            self.lbl_zoom.config(text=f"{int(self.zoom*100)}%")
-            self.update_view()
-    
-    def pan(self, e):
-        if self.slide_dimensions[0] and hasattr(self, 'pan_start'):
-            dx = (self.pan_start[0] - e.x) / self.zoom
-            dy = (self.pan_start[1] - e.y) / self.zoom
-            self.offset_x += dx
-            self.offset_y += dy
-            self.pan_start = (e.x, e.y)
-            self.update_view()
-    
-    def clear_tracking(self):
-        """Clear all tracking data"""
-        for percent in self.tracking_grids:
-            if self.tracking_grids[percent] is not None:
-                self.tracking_grids[percent].fill(False)
-        self.update_map()
-        messagebox.showinfo("Info", "Tracking cleared")
-    
-    def reset(self):
-        self.zoom = 1.0
-        self.offset_x = 0
-        self.offset_y = 0
-        self.lbl_zoom.config(text="100%")
-        self.update_view()
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.geometry("1000x700")
-    app = WSITrackingViewer(root)
+import concurrent.futures
+import functools
+import math
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox
+from PIL import Image, ImageTk
+import numpy as np
+import tifffile
+
+# Decoded regions are read as superblocks aligned to this size (level-0
+# pixels) and cached, so a slow pan keeps hitting the same decoded block
+BLOCK = 2048
+
+# OpenSlide's own tile cache (default 32 MiB) re-decodes constantly on
+# large slides; give it 1 GiB when the installed version supports it
+OPENSLIDE_CACHE_BYTES = 1 << 30
+
+def _interleave_bits(x, y):
+    """Spread the bits of x and y into a single Morton (Z-order) index"""
+    z = 0
+    for i in range(16):
+        z |= ((x >> i) & 1) << (2 * i)
+        z |= ((y >> i) & 1) << (2 * i + 1)
+    return z
+
+def _morton_order(n_cols, n_rows):
+    """Yield (col, row) pairs in Z-order so consecutive reads stay in the
+    same decoded slide block instead of sweeping whole rows"""
+    yield from sorted(((c, r) for c in range(n_cols) for r in range(n_rows)),
+                      key=lambda cr: _interleave_bits(cr[0], cr[1]))
+
+def _build_pyramid(image):
+    """Build a power-of-2 pyramid so zoom-out reads cost O(target pixels)
+    instead of cropping the full resolution. Level 0 is the original image;
+    modes reduce() rejects (palette, 1-bit, 16-bit) are converted once for
+    the smaller levels."""
+    im = image
+    if im.mode == 'P':
+        im = im.convert('RGBA' if 'transparency' in im.info else 'RGB')
+    elif im.mode == '1':
+        im = im.convert('L')
+    elif im.mode.startswith('I;16'):
+        im = im.convert('I')
+    pyramid = [image]
+    while min(im.size) > 512:
+        im = im.reduce(2)  # fast box filter
+        pyramid.append(im)
+    return pyramid
+
+try:
+    import openslide
+    OPENSLIDE_AVAILABLE = True
+except ImportError:
+    OPENSLIDE_AVAILABLE = False
+    print("OpenSlide not available. Install: pip install openslide-python")
+
+class WSITrackingViewer:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("WSI Viewer with Tracking Map")
+        
+        # Image variables
+        self.slide = None
+        self.image = None
+        self._pyramid = None  # Software pyramid for the PIL fallback
+        self.use_openslide = False
+        self.slide_dimensions = (0, 0)
+        self.level_count = 0
+        self.level_dimensions = []
+        self.level_downsamples = []
+        self._ds_log = None  # Precomputed log(downsample) per level
+        self._best_level_memo = None  # Last (zoom, level) answer
+
+        # View variables
+        self.zoom = 1.0
+        self.offset_x = 0
+        self.offset_y = 0
+        self._cw = 1  # Canvas size cached from <Configure>, so the hot
+        self._ch = 1  # paths never round-trip into Tk via winfo_*
+        self.photo = None
+        self._image_item = None  # Persistent canvas item holding self.photo
+        self._map_item = None  # Persistent canvas item holding the map image
+        self._base_region = None  # Last decoded region for the main canvas
+        self._base_key = None
+        self._interactive = False  # True while a pan/zoom gesture is running
+        self._hq_after_id = None
+        self._redraw_pending = False
+        self._zoom_after_id = None  # Pending debounced zoom render
+        self._io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self._inflight = set()  # Futures that may still read self.slide
+        self._view_req = 0  # Monotonic id so stale decodes are discarded
+        self._track_lock = threading.Lock()  # Guards tracking/overlay writes
+        self._prefetch_level = None
+        self._prefetch_gen = 0  # Bumped when a zoom change invalidates the level
+
+        # Tracking variables - by percentage
+        self.tracking_levels = [10, 40, 60, 80]
+        self.level_masks = {p: 1 << i for i, p in enumerate(self.tracking_levels)}
+        self.level_ranks = {p: i + 1 for i, p in enumerate(self.tracking_levels)}
+        self.tracking = None  # One uint8 bitmap, bit i = level i visited
+        self._last_marked = None  # (mask, range) of the previous mark_visited
+        self.tracking_colors = {
+            10: (0, 200, 0, 100),      # Green - low zoom
+            40: (0, 100, 255, 100),    # Blue
+            60: (255, 165, 0, 100),    # Orange
+            80: (255, 0, 0, 100)       # Red - high zoom
+        }
+        self.grid_cell_size = 100  # Size of tracking grid cells in pixels
+        
+        # Map variables
+        self.map_thumbnail = None
+        self._thumb_base = None  # Slide overview, built once per slide
+        self._thumb_base_rgb = None  # Same pixels as a uint8 RGB array
+        self._map_rgb = None  # Base + tracking colors, patched incrementally
+        self._blend = None  # Per-level base pre-blended with the level color
+        self._overlay_rank = None  # Priority of the color each pixel holds
+        self._xs = None  # Cell index -> thumbnail pixel lookup tables
+        self._ys = None
+        self.map_scale_x = 1.0
+        self.map_scale_y = 1.0
+        self.tracking_overlay = None
+        self.viewport_rect = None
+        self._map_dirty = False  # Overlay needs a rebuild
+        self._map_after_id = None  # Pending throttled update_map
+        
+        self.setup_ui()
+        
+    def setup_ui(self):
+        # Top controls
+        top = tk.Frame(self.root)
+        top.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+        
+        tk.Button(top, text="Load Image", command=self.load_image, 
+                 width=12, bg='lightblue').pack(side=tk.LEFT, padx=2)
+        
+        tk.Label(top, text="Quick Zoom:").pack(side=tk.LEFT, padx=5)
+        for percent in [10, 40, 60, 80]:
+            color = {10: 'lightgreen', 40: 'lightblue', 60: 'orange', 80: 'salmon'}[percent]
+            tk.Button(top, text=f"{percent}%", 
+                     command=lambda p=percent: self.set_zoom_percent(p), 
+                     width=5, bg=color).pack(side=tk.LEFT, padx=1)
+        
+        tk.Button(top, text="-", command=self.zoom_out, width=3).pack(side=tk.LEFT, padx=(10,0))
+        self.lbl_zoom = tk.Label(top, text="100%", width=8, relief=tk.SUNKEN, 
+                                 font=('Arial', 9, 'bold'))
+        self.lbl_zoom.pack(side=tk.LEFT)
+        tk.Button(top, text="+", command=self.zoom_in, width=3).pack(side=tk.LEFT)
+        
+        tk.Button(top, text="Reset", command=self.reset, width=6).pack(side=tk.LEFT, padx=10)
+        tk.Button(top, text="Clear Tracking", command=self.clear_tracking, 
+                 width=12, bg='lightyellow').pack(side=tk.LEFT, padx=2)
+        
+        self.lbl_info = tk.Label(top, text="", fg='gray')
+        self.lbl_info.pack(side=tk.RIGHT, padx=10)
+        
+        # Main area
+        main = tk.Frame(self.root)
+        main.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Canvas
+        canvas_frame = tk.Frame(main, relief=tk.SUNKEN, bd=2)
+        canvas_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.canvas = tk.Canvas(canvas_frame, bg='gray')
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        
+        # Side panel
+        side = tk.Frame(main, width=320, relief=tk.RAISED, bd=2)
+        side.pack(side=tk.RIGHT, fill=tk.Y, padx=(5,0))
+        side.pack_propagate(False)
+        
+        tk.Label(side, text="Navigation Map", font=('Arial', 11, 'bold')).pack(pady=10)
+        
+        # Map canvas
+        self.canvas_map = tk.Canvas(side, width=300, height=300, bg='lightgray', 
+                                    relief=tk.SUNKEN, bd=2)
+        self.canvas_map.pack(padx=10, pady=10)
+        
+        tk.Label(side, text="Click map to navigate", font=('Arial', 8, 'italic'), 
+                fg='gray').pack()
+        
+        # Legend
+        legend_frame = tk.LabelFrame(side, text="Tracking Legend", font=('Arial', 10, 'bold'))
+        legend_frame.pack(padx=10, pady=15, fill=tk.X)
+        
+        tk.Label(legend_frame, text="Visited areas by zoom level:", 
+                font=('Arial', 8)).pack(pady=(5,8))
+        
+        for percent in [10, 40, 60, 80]:
+            lf = tk.Frame(legend_frame)
+            lf.pack(anchor='w', padx=15, pady=3)
+            color_rgb = self.tracking_colors[percent][:3]
+            color_hex = '#%02x%02x%02x' % color_rgb
+            canvas_color = tk.Canvas(lf, width=25, height=18, bg=color_hex, 
+                                    relief=tk.SOLID, borderwidth=1)
+            canvas_color.pack(side=tk.LEFT)
+            tk.Label(lf, text=f" {percent}% zoom", font=('Arial', 9)).pack(side=tk.LEFT)
+        
+        # Info
+        info_frame = tk.LabelFrame(side, text="Image Info")
+        info_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        
+        self.lbl_details = tk.Label(info_frame, text="No image loaded", 
+                                    fg='gray', wraplength=280, justify=tk.LEFT, 
+                                    font=('Arial', 8))
+        self.lbl_details.pack(pady=10, padx=10, anchor='w')
+        
+        # Status
+        self.lbl_status = tk.Label(side, text="", fg='green', font=('Arial', 8, 'italic'))
+        self.lbl_status.pack(pady=5)
+        
+        # Bindings
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        self.canvas.bind("<ButtonPress-1>", lambda e: setattr(self, 'pan_start', (e.x, e.y)))
+        self.canvas.bind("<B1-Motion>", self.pan)
+        self.canvas.bind("<MouseWheel>", lambda e: self.zoom_in() if e.delta > 0 else self.zoom_out())
+        self.canvas.bind("<Button-4>", lambda e: self.zoom_in())
+        self.canvas.bind("<Button-5>", lambda e: self.zoom_out())
+        self.canvas_map.bind("<Button-1>", self.click_map)
+
+    def _on_canvas_configure(self, e):
+        self._cw, self._ch = e.width, e.height
+
+
+    def load_image(self):
+        path = filedialog.askopenfilename(
+            filetypes=[
+                ("Whole Slide", "*.ndpi *.svs *.tif *.tiff *.vms *.vmu *.scn *.mrxs *.bif"),
+                ("All Images", "*.png *.jpg *.jpeg *.bmp"),
+                ("All", "*.*")
+            ])
+        if not path:
+            return
+
+        # Heavy decode runs off the Tk thread so the UI stays responsive
+        self.lbl_status.config(text="Loading image...", fg='blue')
+        threading.Thread(target=self._load_worker, args=(path,), daemon=True).start()
+
+    def _load_worker(self, path):
+        """Open the slide/image in a worker thread, post the result back"""
+        try:
+            slide = None
+            image = None
+
+            # Try OpenSlide
+            if OPENSLIDE_AVAILABLE and path.lower().endswith(('.ndpi', '.svs', '.vms', '.vmu', '.scn', '.mrxs', '.tif', '.tiff', '.bif')):
+                try:
+                    slide = openslide.OpenSlide(path)
+                except openslide.OpenSlideError:
+                    slide = None
+
+            # Fallback to PIL
+            pyramid = None
+            if slide is None:
+                if path.endswith(('.tif', '.tiff')):
+                    image = Image.fromarray(tifffile.imread(path))
+                else:
+                    image = Image.open(path)
+                # Build the pyramid here too: the first reduce forces the
+                # full decode, which must not run on the Tk thread
+                pyramid = _build_pyramid(image)
+
+            # Build the map thumbnail here too; get_thumbnail reads only the
+            # smallest pyramid level but is still too slow for the Tk thread
+            if slide is not None:
+                thumb = slide.get_thumbnail((290, 290))
+            else:
+                # Box-reduce by an integer factor first (memory-bandwidth
+                # fast), leaving only a small LANCZOS pass at the end;
+                # reduce() rejects palette/1-bit/16-bit modes, which fall
+                # back to the plain thumbnail() path
+                factor = min(image.width // 290, image.height // 290)
+                if factor > 1 and image.mode in ('RGB', 'RGBA', 'L', 'LA'):
+                    thumb = image.reduce(factor)
+                else:
+                    thumb = image.copy()
+                thumb.thumbnail((290, 290), Image.Resampling.LANCZOS)
+
+            self.root.after(0, self._on_loaded, slide, image, thumb, pyramid)
+        except Exception as e:
+            self.root.after(0, self._on_load_error, e)
+
+    def _submit_io(self, fn, *args):
+        """Submit a worker job, remembering it until it finishes so a slide
+        swap can wait for reads that still target the old handle"""
+        fut = self._io_pool.submit(fn, *args)
+        self._inflight.add(fut)
+        fut.add_done_callback(self._inflight.discard)
+        return fut
+
+    def _close_when_drained(self, old_slide, pending):
+        """Close a replaced slide once outstanding worker reads are done
+
+        OpenSlide forbids closing a handle that other threads are still
+        reading, so the wait runs on a helper thread off the Tk loop.
+        """
+        def _drain():
+            concurrent.futures.wait(pending)
+            old_slide.close()
+            # Reads that were already running may have repopulated the LRU
+            # with old-slide pixels; clear it again now that they are done
+            self._read_region_cached.cache_clear()
+        threading.Thread(target=_drain, daemon=True).start()
+
+    def _on_loaded(self, slide, image, thumb, pyramid):
+        """Install the freshly loaded slide/image (runs on the Tk thread)"""
+        # Invalidate in-flight work before touching the old handle: results
+        # of queued decodes are refused and queued prefetches stop early
+        self._view_req += 1
+        self._prefetch_gen += 1
+        self._prefetch_level = None
+        if self.slide:
+            self._close_when_drained(self.slide, list(self._inflight))
+        self.slide = slide
+        self.image = image
+        self._pyramid = None
+        self._base_region = None
+        self._base_key = None
+        self._best_level_memo = None
+        self._read_region_cached.cache_clear()
+
+        # Drop canvas items tied to the previous slide's buffer sizes
+        self.canvas.delete("all")
+        self.canvas_map.delete("all")
+        self._image_item = None
+        self._map_item = None
+        self.viewport_rect = None
+        self.photo = None
+        self.map_thumbnail = None
+
+        if slide is not None:
+            try:
+                slide.set_cache(openslide.OpenSlideCache(OPENSLIDE_CACHE_BYTES))
+            except AttributeError:
+                pass  # openslide-python < 1.3 has no cache API
+            self.use_openslide = True
+            self.slide_dimensions = slide.dimensions
+            self.level_count = slide.level_count
+            self.level_dimensions = slide.level_dimensions
+            self.level_downsamples = slide.level_downsamples
+            self._ds_log = np.log(np.asarray(self.level_downsamples))
+            self.lbl_status.config(text=f"✓ OpenSlide ({self.level_count} levels)", fg='green')
+        else:
+            self.use_openslide = False
+            self.slide_dimensions = (image.width, image.height)
+            # The software pyramid was built in the load worker
+            self._pyramid = pyramid
+            self.lbl_status.config(text="✓ PIL/tifffile", fg='orange')
+
+        # The map thumbnail was built in the load worker; just install it
+        self._thumb_base = thumb
+        self.map_scale_x = thumb.width / self.slide_dimensions[0]
+        self.map_scale_y = thumb.height / self.slide_dimensions[1]
+
+        # Pre-blend the base with every tracking color once, so marking a
+        # cell is a copy from the right blend plane — no alpha math and no
+        # RGBA composite ever runs after this point
+        base = np.asarray(thumb.convert('RGB'), dtype=np.float32)
+        self._blend = {}
+        for p, (r, g, b, a) in self.tracking_colors.items():
+            alpha = a / 255.0
+            self._blend[p] = (base * (1.0 - alpha)
+                              + np.array([r, g, b], np.float32) * alpha).astype(np.uint8)
+        self._thumb_base_rgb = base.astype(np.uint8)
+        self._map_rgb = self._thumb_base_rgb.copy()
+        self._overlay_rank = np.zeros((thumb.height, thumb.width), np.uint8)
+
+        self.initialize_tracking()
+        self.update_info()
+        self.reset()
+        messagebox.showinfo("Success",
+            f"Loaded: {self.slide_dimensions[0]} x {self.slide_dimensions[1]} px\n"
+            f"Method: {'OpenSlide' if self.use_openslide else 'Standard'}")
+
+    def _on_load_error(self, e):
+        messagebox.showerror("Error", f"Could not load:\n{str(e)}")
+        self.lbl_status.config(text="✗ Error", fg='red')
+    
+    def initialize_tracking(self):
+        """Initialize the tracking bitmap (one bit per zoom level per cell)
+
+        All four zoom levels pack into a single uint8 plane, so the whole
+        grid for a 100k x 100k slide is about 1 MB. Packing cells further
+        into uint64 words would shrink that 8x but make the hot
+        mark_visited slice-OR a three-part masked write; with the overlay
+        maintained incrementally nothing scans this array per frame, so
+        the byte-per-cell layout is the better trade.
+        """
+        w, h = self.slide_dimensions
+        grid_w = (w // self.grid_cell_size) + 1
+        grid_h = (h // self.grid_cell_size) + 1
+
+        self.tracking = np.zeros((grid_h, grid_w), dtype=np.uint8)
+        self._last_marked = None
+
+        # Highest valid cell index per axis, cached for the hot mark path
+        self._grid_max = (grid_h - 1, grid_w - 1)
+
+        # Cell edge -> thumbnail pixel, computed once instead of multiplying
+        # cell * scale on every mark
+        self._xs = (np.arange(grid_w + 1) * self.grid_cell_size
+                    * self.map_scale_x).astype(np.int32)
+        self._ys = (np.arange(grid_h + 1) * self.grid_cell_size
+                    * self.map_scale_y).astype(np.int32)
+    
+    def update_info(self):
+        w, h = self.slide_dimensions
+        info = f"Size: {w:,} x {h:,} px\n"
+        info += f"Megapixels: {w * h / 1e6:.1f}\n\n"
+        if self.use_openslide:
+            info += f"Pyramid Levels: {self.level_count}\n"
+            mag = self.slide.properties.get(openslide.PROPERTY_NAME_OBJECTIVE_POWER, 'N/A')
+            info += f"Magnification: {mag}\n"
+        self.lbl_details.config(text=info)
+        self.lbl_info.config(text=f"{w} x {h} px")
+    
+    def get_best_level(self, zoom):
+        if not self.use_openslide:
+            return 0
+
+        # Short-circuit repeated queries at the same zoom
+        if self._best_level_memo is not None and self._best_level_memo[0] == zoom:
+            return self._best_level_memo[1]
+
+        # Binary-search the precomputed log downsamples for 1/zoom
+        target = -math.log(zoom)
+        idx = int(np.searchsorted(self._ds_log, target))
+        if idx >= len(self._ds_log):
+            idx = len(self._ds_log) - 1
+        elif idx > 0 and abs(self._ds_log[idx - 1] - target) <= abs(self._ds_log[idx] - target):
+            idx -= 1
+
+        self._best_level_memo = (zoom, idx)
+        return idx
+    
+    # Entries are whole superblocks (a level-0 read spanning block
+    # boundaries can reach 4096x4096 px, ~48 MB decoded), so keep the
+    # LRU small; OpenSlide's own 1 GiB cache sits underneath it anyway
+    @functools.lru_cache(maxsize=8)
+    def _read_region_cached(self, x, y, width, height, level):
+        """Decode a tile-aligned region (cache hits skip the JPEG/JP2K decode)"""
+        downsample = self.level_downsamples[level]
+        level_width = int(width / downsample)
+        level_height = int(height / downsample)
+        region = self.slide.read_region((x, y), level, (level_width, level_height))
+        # Drop the alpha channel with a numpy slice instead of PIL's
+        # convert('RGB'), which allocates and copies a whole extra buffer
+        return Image.fromarray(np.asarray(region)[..., :3], 'RGB')
+
+    def read_region(self, x, y, width, height, zoom, resample=Image.Resampling.LANCZOS):
+        if self.use_openslide:
+            level = self.get_best_level(zoom)
+            downsample = self.level_downsamples[level]
+
+            # Round the read up to BLOCK-aligned superblocks; the extra
+            # pixels around the viewport are kept for the next frames
+            x0 = (int(x) // BLOCK) * BLOCK
+            y0 = (int(y) // BLOCK) * BLOCK
+            x1 = ((int(x + width) + BLOCK - 1) // BLOCK) * BLOCK
+            y1 = ((int(y + height) + BLOCK - 1) // BLOCK) * BLOCK
+
+            region = self._read_region_cached(x0, y0, x1 - x0, y1 - y0, level)
+
+            crop_x = int((x - x0) / downsample)
+            crop_y = int((y - y0) / downsample)
+            region = region.crop((crop_x, crop_y,
+                                  crop_x + int(width / downsample),
+                                  crop_y + int(height / downsample)))
+
+            # Only resample when the decoded level size differs from the target
+            target_width = int(width * zoom)
+            target_height = int(height * zoom)
+            if region.size != (target_width, target_height):
+                if resample == Image.Resampling.LANCZOS:
+                    if target_width < region.width and target_height < region.height:
+                        # BOX is much cheaper than LANCZOS for pure downscale
+                        resample = Image.Resampling.BOX
+                    else:
+                        # Residual upscale from the nearest pyramid level is
+                        # at most ~2x; BILINEAR is indistinguishable there
+                        resample = Image.Resampling.BILINEAR
+                region = region.resize((target_width, target_height), resample)
+            return region
+        else:
+            # Crop from the closest software pyramid level so zoom-out
+            # touches O(target) pixels rather than the full resolution
+            level = 0
+            if self._pyramid and zoom < 1:
+                level = min(len(self._pyramid) - 1, int(-math.log2(zoom)))
+            src = self._pyramid[level] if self._pyramid else self.image
+            scale = 1 << level
+
+            x2 = min(x + width, self.image.width)
+            y2 = min(y + height, self.image.height)
+            region = src.crop((int(x / scale), int(y / scale),
+                               int(x2 / scale), int(y2 / scale)))
+            target_w = int((x2 - x) * zoom)
+            target_h = int((y2 - y) * zoom)
+            if region.size != (target_w, target_h):
+                region = region.resize((target_w, target_h), resample)
+            return region
+    
+    def get_tracking_level(self, zoom_percent):
+        """Get closest tracking level for current zoom percentage"""
+        return min(self.tracking_levels, key=lambda x: abs(x - zoom_percent))
+    
+    def mark_visited(self):
+        """Mark current viewport as visited
+
+        This is the only place overlay pixels are written: a handful of
+        numpy slice ops over one viewport-sized patch of a <=290 px
+        thumbnail, so there is no grid-sized rasterization loop left that
+        would justify a compiled (e.g. numba) fast path.
+        """
+        if not self.slide_dimensions[0]:
+            return
+        
+        # Convert zoom to percentage
+        zoom_percent = int(self.zoom * 100)
+        
+        # Find closest tracking level
+        tracking_level = self.get_tracking_level(zoom_percent)
+
+        if self.tracking is None:
+            return
+        mask = self.level_masks[tracking_level]
+
+        w, h = max(self._cw, 1), max(self._ch, 1)
+        view_w = w / self.zoom
+        view_h = h / self.zoom
+
+        # Mark grid cells as visited (single vectorized OR); cell size and
+        # grid bounds are bound locally since this runs per mouse event
+        cell = self.grid_cell_size
+        gy_max, gx_max = self._grid_max
+        grid_x1 = max(0, int(self.offset_x) // cell)
+        grid_y1 = max(0, int(self.offset_y) // cell)
+        grid_x2 = min(gx_max, int(self.offset_x + view_w) // cell)
+        grid_y2 = min(gy_max, int(self.offset_y + view_h) // cell)
+
+        # Idle hovering hits the exact same range every frame; bail out
+        # before touching the bitmap at all
+        rng = (mask, grid_x1, grid_y1, grid_x2, grid_y2)
+        if rng == self._last_marked:
+            return
+        self._last_marked = rng
+
+        # Serialize with any worker-thread reader of the tracking state
+        with self._track_lock:
+            sub = self.tracking[grid_y1:grid_y2+1, grid_x1:grid_x2+1]
+            if (sub & mask).all():
+                # Every cell already carries this level's bit; nothing new to
+                # record and no reason to dirty the map
+                return
+            sub |= mask
+
+            # Patch only the newly marked rectangle into the persistent map
+            # buffer, letting higher-priority (higher zoom) colors win
+            if self._map_rgb is not None:
+                px1 = int(self._xs[grid_x1])
+                py1 = int(self._ys[grid_y1])
+                px2 = min(self._map_rgb.shape[1], int(self._xs[grid_x2 + 1]) + 1)
+                py2 = min(self._map_rgb.shape[0], int(self._ys[grid_y2 + 1]) + 1)
+                rank = self.level_ranks[tracking_level]
+                sub_rank = self._overlay_rank[py1:py2, px1:px2]
+                sel = sub_rank < rank
+                self._map_rgb[py1:py2, px1:px2][sel] = \
+                    self._blend[tracking_level][py1:py2, px1:px2][sel]
+                sub_rank[sel] = rank
+
+        self._map_dirty = True
+
+    def _schedule_map_update(self):
+        """Coalesce bursts of pan/zoom events into ~12 map refreshes per second
+
+        The viewport rectangle is cheap and still moves every frame; only the
+        overlay rebuild is throttled.
+        """
+        if self._map_dirty and self._map_after_id is None:
+            self._map_after_id = self.canvas_map.after(80, self._do_map_update)
+
+    def _do_map_update(self):
+        self._map_after_id = None
+        if self._map_dirty:
+            self._map_dirty = False
+            self.update_map()
+
+    def update_map(self):
+        """Update navigation map with tracking overlay"""
+        if not self.slide_dimensions[0]:
+            return
+        
+        # mark_visited keeps the RGB map buffer current (base pixels already
+        # blended with the tracking colors). Note frombuffer is NOT zero-copy
+        # for 3-byte RGB — Pillow unpacks into its 4-byte storage — but that
+        # one small copy is all a refresh costs before the PhotoImage blit
+        if self._map_rgb is None:
+            return
+        h, w = self._map_rgb.shape[:2]
+        thumb_with_tracking = Image.frombuffer('RGB', (w, h), self._map_rgb,
+                                               'raw', 'RGB', 0, 1)
+        
+        # Blit into the existing map PhotoImage rather than rebuilding it
+        if (self.map_thumbnail is None or self._map_item is None
+                or (self.map_thumbnail.width(),
+                    self.map_thumbnail.height()) != thumb_with_tracking.size):
+            self.map_thumbnail = ImageTk.PhotoImage(thumb_with_tracking)
+            if self._map_item is not None:
+                self.canvas_map.delete(self._map_item)
+            self._map_item = self.canvas_map.create_image(150, 150, image=self.map_thumbnail)
+        else:
+            self.map_thumbnail.paste(thumb_with_tracking)
+
+        self.update_viewport_rect()
+    
+    def update_viewport_rect(self):
+        """Draw viewport rectangle on map"""
+        if not self.slide_dimensions[0] or not self.map_thumbnail:
+            return
+        
+        w, h = max(self._cw, 1), max(self._ch, 1)
+        view_w = w / self.zoom
+        view_h = h / self.zoom
+        
+        x1 = (self.offset_x * self.map_scale_x) + (150 - (self.map_thumbnail.width() / 2))
+        y1 = (self.offset_y * self.map_scale_y) + (150 - (self.map_thumbnail.height() / 2))
+        x2 = x1 + (view_w * self.map_scale_x)
+        y2 = y1 + (view_h * self.map_scale_y)
+        
+        # One persistent rectangle item, moved with coords(); recreated only
+        # when a new slide wipes the map canvas
+        if self.viewport_rect is None:
+            self.viewport_rect = self.canvas_map.create_rectangle(
+                0, 0, 0, 0, outline='white', width=3
+            )
+        self.canvas_map.coords(self.viewport_rect, x1, y1, x2, y2)
+        self.canvas_map.tag_raise(self.viewport_rect)
+    
+    def update_view(self):
+        if not self.slide_dimensions[0]:
+            return
+        
+        w, h = max(self._cw, 1), max(self._ch, 1)
+        view_w = int(w / self.zoom)
+        view_h = int(h / self.zoom)
+        
+        max_w, max_h = self.slide_dimensions
+        view_w = min(view_w, max_w)
+        view_h = min(view_h, max_h)
+        
+        self.offset_x = max(0, min(self.offset_x, max_w - view_w))
+        self.offset_y = max(0, min(self.offset_y, max_h - view_h))
+        
+        # Mark as visited
+        self.mark_visited()
+        
+        # Snap the read origin to whole pixels aligned to the level's
+        # downsample so consecutive frames produce identical cache keys
+        snap = 1
+        if self.use_openslide:
+            snap = max(1, int(self.level_downsamples[self.get_best_level(self.zoom)]))
+        ox = (int(self.offset_x) // snap) * snap
+        oy = (int(self.offset_y) // snap) * snap
+
+        # Read and display region, reusing the last decoded image when the
+        # viewport has not actually changed
+        # Fast resampling while a gesture is active, high quality once settled
+        resample = Image.Resampling.NEAREST if self._interactive else Image.Resampling.LANCZOS
+        key = (ox, oy, view_w, view_h, round(self.zoom, 4), self._interactive)
+        if key == self._base_key and self._base_region is not None:
+            self._display_region(self._base_region, ox, oy)
+        else:
+            # Decode in the worker pool so panning never blocks the UI;
+            # the request id lets us drop results the user has panned past
+            self._view_req += 1
+            req = self._view_req
+            fut = self._submit_io(self.read_region, ox, oy, view_w, view_h,
+                                  self.zoom, resample)
+            fut.add_done_callback(
+                lambda f: self.root.after(0, self._on_region_ready, req, key, ox, oy, f))
+
+        # Viewport rectangle tracks every frame; the overlay is throttled
+        self.update_viewport_rect()
+        self._schedule_map_update()
+
+        # Warm the cache for the regions the user is likely to pan into
+        self._prefetch_neighbors(view_w, view_h)
+
+    def _prefetch_neighbors(self, view_w, view_h):
+        """Speculatively decode the 8 neighbor regions in the background"""
+        if not self.use_openslide:
+            return
+
+        level = self.get_best_level(self.zoom)
+        if level != self._prefetch_level:
+            # Zoom moved to another pyramid level; stale jobs stop early
+            self._prefetch_gen += 1
+            self._prefetch_level = level
+
+        # Submit the 3x3 window in Z-order so speculative decodes keep
+        # 2D locality in the tile caches
+        for i, j in _morton_order(3, 3):
+            dx, dy = (i - 1) * view_w, (j - 1) * view_h
+            if dx == 0 and dy == 0:
+                continue
+            x = self.offset_x + dx
+            y = self.offset_y + dy
+            if (x < 0 or y < 0 or
+                    x >= self.slide_dimensions[0] or y >= self.slide_dimensions[1]):
+                continue
+            self._submit_io(self._prefetch_region, x, y,
+                            view_w, view_h, level, self._prefetch_gen)
+
+    def _prefetch_region(self, x, y, width, height, level, gen):
+        if gen != self._prefetch_gen:
+            return
+        x0 = (int(x) // BLOCK) * BLOCK
+        y0 = (int(y) // BLOCK) * BLOCK
+        x1 = ((int(x + width) + BLOCK - 1) // BLOCK) * BLOCK
+        y1 = ((int(y + height) + BLOCK - 1) // BLOCK) * BLOCK
+        try:
+            # Cache hits return immediately, so already-decoded jobs are free
+            self._read_region_cached(x0, y0, x1 - x0, y1 - y0, level)
+        except Exception:
+            pass  # Prefetch is best-effort; the foreground read reports errors
+
+    def _on_region_ready(self, req, key, ox, oy, fut):
+        """Install a decoded region on the Tk thread, unless it is stale"""
+        if req != self._view_req:
+            return
+        try:
+            region = fut.result()
+        except Exception as e:
+            # Unlike prefetch, the visible read failing must not be silent:
+            # the canvas would just freeze on the previous frame
+            self.lbl_status.config(text=f"✗ Read failed: {e}", fg='red')
+            return
+        self._base_region = region
+        self._base_key = key
+        self._display_region(region, ox, oy)
+
+    def _display_region(self, region, ox, oy):
+        # Reuse the Tk-side image buffer; reallocate only when the rendered
+        # size changes (zoom step or window resize)
+        if (self.photo is None or self._image_item is None
+                or (self.photo.width(), self.photo.height()) != region.size):
+            self.photo = ImageTk.PhotoImage(region)
+            if self._image_item is not None:
+                self.canvas.delete(self._image_item)
+            self._image_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+        else:
+            self.photo.paste(region)
+        # Apply the sub-snap residual by moving the image item, not re-reading
+        self.canvas.coords(self._image_item,
+                           -(self.offset_x - ox) * self.zoom,
+                           -(self.offset_y - oy) * self.zoom)
+    
+    def click_map(self, event):
+        """Navigate by clicking on map"""
+        if not self.slide_dimensions[0] or not self.map_thumbnail:
+            return
+        
+        map_x = event.x - (150 - (self.map_thumbnail.width() / 2))
+        map_y = event.y - (150 - (self.map_thumbnail.height() / 2))
+        
+        img_x = map_x / self.map_scale_x
+        img_y = map_y / self.map_scale_y
+        
+        w, h = max(self._cw, 1), max(self._ch, 1)
+        self.offset_x = img_x - (w / self.zoom / 2)
+        self.offset_y = img_y - (h / self.zoom / 2)
+        
+        self.update_view()
+    
+    def set_zoom_percent(self, percent):
+        """Set zoom by percentage"""
+        if self.slide_dimensions[0]:
+            self.zoom = percent / 100.0
+            self.lbl_zoom.config(text=f"{percent}%")
+            self._interactive = True
+            self._schedule_view_update()
+            self._schedule_finalize()
+
+    def _schedule_view_update(self):
+        """Collapse a burst of zoom ticks into one render shortly after the
+        last one; only the final zoom value is decoded"""
+        if self._zoom_after_id is not None:
+            self.root.after_cancel(self._zoom_after_id)
+        self._zoom_after_id = self.root.after(50, self._do_zoom_update)
+
+    def _do_zoom_update(self):
+        self._zoom_after_id = None
+        self.update_view()
+
+
+    def _request_redraw(self):
+        """Coalesce bursts of pan/zoom events into one render per idle cycle"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.root.after_idle(self._do_redraw)
+
+    def _do_redraw(self):
+        self._redraw_pending = False
+        self.update_view()
+
+    def _schedule_finalize(self):
+        """Re-render once in high quality after the gesture stops"""
+        if self._hq_after_id is not None:
+            self.root.after_cancel(self._hq_after_id)
+        self._hq_after_id = self.root.after(150, self._finalize_render)
+
+    def _finalize_render(self):
+        self._hq_after_id = None
+        self._interactive = False
+        self.update_view()
+
+    def zoom_in(self):
+        if self.slide_dimensions[0]:
+            self.zoom = min(self.zoom * 1.5, 10.0)
+            self.lbl_zoom.config(text=f"{int(self.zoom*100)}%")
+            self._interactive = True
+            self._schedule_view_update()
+            self._schedule_finalize()
+
+    def zoom_out(self):
+        if self.slide_dimensions[0]:
+            self.zoom = max(self.zoom / 1.5, 0.05)
+            self.lbl_zoom.config(text=f"{int(self.zoom*100)}%")
+            self._interactive = True
+            self._schedule_view_update()
+            self._schedule_finalize()
+
+    def pan(self, e):
+        if self.slide_dimensions[0] and hasattr(self, 'pan_start'):
+            dx = (self.pan_start[0] - e.x) / self.zoom
+            dy = (self.pan_start[1] - e.y) / self.zoom
+            self.offset_x += dx
+            self.offset_y += dy
+            self.pan_start = (e.x, e.y)
+            self._interactive = True
+            self._request_redraw()
+            self._schedule_finalize()
+    
+    def clear_tracking(self):
+        """Clear all tracking data"""
+        if self.tracking is not None:
+            self.tracking.fill(0)
+        if self._map_rgb is not None:
+            self._map_rgb[:] = self._thumb_base_rgb
+            self._overlay_rank.fill(0)
+        self._last_marked = None
+        self._map_dirty = True
+        self._schedule_map_update()
+        messagebox.showinfo("Info", "Tracking cleared")
+    
+    def reset(self):
+        self.zoom = 1.0
+        self.offset_x = 0
+        self.offset_y = 0
+        self.lbl_zoom.config(text="100%")
+        self.update_view()
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.geometry("1000x700")
+    app = WSITrackingViewer(root)
     root.mainloop()
\ No newline at end of file